@@ -0,0 +1,29 @@
+import time
+
+import frappe
+
+from itqan_mobile_app.utils.catalog import ITEM_FIELDS, build_items_details
+from itqan_mobile_app.utils.profiling import record_queries
+
+
+def run(sizes=(10, 100, 1000, 10000)):
+    """Query count and latency of the items catalog at growing page sizes.
+
+    bench --site <site> execute itqan_mobile_app.benchmarks.catalog.run
+    """
+    results = []
+    for size in sizes:
+        start = time.monotonic()
+        with record_queries() as recorder:
+            items = frappe.get_all("Item", fields=ITEM_FIELDS, limit_page_length=size)
+            items = build_items_details(items)
+
+        results.append({
+            "page_length": size,
+            "items": len(items),
+            "queries": recorder.count,
+            "query_ms": round(recorder.duration * 1000, 2),
+            "wall_ms": round((time.monotonic() - start) * 1000, 2)
+        })
+
+    return results
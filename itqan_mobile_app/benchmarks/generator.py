@@ -0,0 +1,265 @@
+import random
+
+import frappe
+from frappe.utils import add_days, flt, getdate, now, nowdate
+
+from itqan_mobile_app.utils.cache import CACHE_PREFIX
+from itqan_mobile_app.utils.rollups import rebuild_sales_rollups
+
+# Every generated document is named with this prefix, so runs can top up or clear them
+PREFIX = "BENCH"
+
+SEED = 42
+
+TAX_TEMPLATES = 3
+TAX_RATES = (5, 10, 15)
+
+
+def get_volumes(size):
+    """Row counts seeded for a data size, scaled from the number of items."""
+    return {
+        "items": size,
+        "customers": max(size // 2, 1),
+        "sales_invoices": size * 2,
+        "payment_entries": size
+    }
+
+
+def seed(size, company=None):
+    """Top the site up to the volumes of `size`; rows from earlier runs are kept.
+
+    Rows are written with `frappe.db.bulk_insert`, skipping controllers, so only
+    read paths can be measured against them. Seeding the same sizes in the same
+    order always yields the same data.
+    """
+    company = company or frappe.db.get_single_value("Global Defaults", "default_company")
+    context = get_context(company)
+    volumes = get_volumes(size)
+
+    seed_tax_templates(context)
+    seed_items(context, volumes["items"])
+    seed_customers(context, volumes["customers"])
+    seed_sales_invoices(context, volumes["sales_invoices"], volumes["items"], volumes["customers"])
+    seed_payment_entries(context, volumes["payment_entries"], volumes["customers"])
+    frappe.db.commit()
+
+    # Bulk inserts skip the hooks keeping the rollups and the app's caches current
+    rebuild_sales_rollups(add_days(nowdate(), -365), nowdate())
+    frappe.cache().delete_keys(f"{CACHE_PREFIX}|")
+
+    return volumes
+
+
+def get_context(company):
+    company_doc = frappe.get_cached_doc("Company", company)
+
+    return frappe._dict({
+        "company": company,
+        "currency": company_doc.default_currency,
+        "receivable_account": company_doc.default_receivable_account,
+        "income_account": company_doc.default_income_account,
+        "cash_account": company_doc.default_cash_account,
+        "cost_center": company_doc.cost_center,
+        "tax_account": frappe.db.get_value("Account", {"company": company, "account_type": "Tax", "is_group": 0}),
+        "item_group": frappe.db.get_value("Item Group", {"is_group": 0}),
+        "customer_group": frappe.db.get_value("Customer Group", {"is_group": 0}),
+        "territory": frappe.db.get_value("Territory", {"is_group": 0}),
+        "uom": frappe.db.get_single_value("Stock Settings", "stock_uom") or "Nos",
+        "price_list": frappe.db.get_single_value("Selling Settings", "selling_price_list") or "Standard Selling",
+        "mode_of_payment": frappe.db.get_value("Mode of Payment", {"enabled": 1}),
+        "country": frappe.db.get_single_value("System Settings", "country")
+    })
+
+
+def make_name(kind, index):
+    return f"{PREFIX}-{kind}-{index:07d}"
+
+
+def get_existing(doctype, kind):
+    return frappe.db.count(doctype, {"name": ["like", f"{PREFIX}-{kind}-%"]})
+
+
+def make_row(name, **fields):
+    timestamp = now()
+    row = {
+        "name": name,
+        "owner": "Administrator",
+        "modified_by": "Administrator",
+        "creation": timestamp,
+        "modified": timestamp,
+        "docstatus": 0
+    }
+    row.update(fields)
+    return row
+
+
+def make_child_row(parent, parenttype, parentfield, idx, **fields):
+    return make_row(
+        frappe.generate_hash(length=10), parent=parent, parenttype=parenttype, parentfield=parentfield, idx=idx,
+        **fields
+    )
+
+
+def insert_rows(doctype, rows):
+    if not rows:
+        return
+
+    fields = list(rows[0])
+    frappe.db.bulk_insert(doctype, fields, [[row[f] for f in fields] for row in rows], ignore_duplicates=True)
+
+
+def seed_tax_templates(context):
+    if not context.tax_account:
+        return
+
+    for i in range(TAX_TEMPLATES):
+        name = make_name("TAX", i)
+        if frappe.db.exists("Item Tax Template", name):
+            continue
+
+        insert_rows("Item Tax Template", [make_row(name, title=name, company=context.company)])
+        insert_rows("Item Tax Template Detail", [
+            make_child_row(name, "Item Tax Template", "taxes", 1, tax_type=context.tax_account, tax_rate=TAX_RATES[i])
+        ])
+
+
+def seed_items(context, count):
+    start = get_existing("Item", "ITEM")
+    rng = random.Random(f"{SEED}-items-{start}")
+
+    for chunk_start in range(start, count, 1000):
+        items, barcodes, taxes, prices = [], [], [], []
+
+        for i in range(chunk_start, min(chunk_start + 1000, count)):
+            name = make_name("ITEM", i)
+            items.append(make_row(
+                name, item_code=name, item_name=f"Benchmark Item {i}", item_group=context.item_group,
+                stock_uom=context.uom, is_stock_item=0, include_item_in_manufacturing=0, disabled=0
+            ))
+            barcodes.append(make_child_row(name, "Item", "barcodes", 1, barcode=f"{PREFIX}{i:010d}"))
+            if context.tax_account:
+                taxes.append(make_child_row(
+                    name, "Item", "taxes", 1, item_tax_template=make_name("TAX", rng.randrange(TAX_TEMPLATES))
+                ))
+            prices.append(make_row(
+                make_name("PRICE", i), item_code=name, item_name=f"Benchmark Item {i}", uom=context.uom,
+                price_list=context.price_list, selling=1, buying=0, currency=context.currency,
+                price_list_rate=flt(rng.uniform(1, 500), 2)
+            ))
+
+        insert_rows("Item", items)
+        insert_rows("Item Barcode", barcodes)
+        insert_rows("Item Tax", taxes)
+        insert_rows("Item Price", prices)
+
+
+def seed_customers(context, count):
+    start = get_existing("Customer", "CUST")
+
+    for chunk_start in range(start, count, 1000):
+        customers, addresses, links = [], [], []
+
+        for i in range(chunk_start, min(chunk_start + 1000, count)):
+            name = make_name("CUST", i)
+            address = make_name("ADDR", i)
+            customers.append(make_row(
+                name, customer_name=f"Benchmark Customer {i}", customer_type="Individual",
+                customer_group=context.customer_group, territory=context.territory,
+                mobile_no=f"05{i:08d}", disabled=0
+            ))
+            addresses.append(make_row(
+                address, address_title=name, address_type="Billing", address_line1=f"{i} Benchmark Street",
+                city="Riyadh", country=context.country, is_primary_address=1, disabled=0
+            ))
+            links.append(make_child_row(address, "Address", "links", 1, link_doctype="Customer", link_name=name))
+
+        insert_rows("Customer", customers)
+        insert_rows("Address", addresses)
+        insert_rows("Dynamic Link", links)
+
+
+def seed_sales_invoices(context, count, item_count, customer_count):
+    start = get_existing("Sales Invoice", "SINV")
+    rng = random.Random(f"{SEED}-invoices-{start}")
+    today = getdate(nowdate())
+
+    for chunk_start in range(start, count, 500):
+        invoices, lines = [], []
+
+        for i in range(chunk_start, min(chunk_start + 500, count)):
+            name = make_name("SINV", i)
+            customer = make_name("CUST", rng.randrange(customer_count))
+            posting_date = add_days(today, -rng.randrange(365))
+
+            total = 0
+            for idx in range(1, rng.randint(1, 10) + 1):
+                item_code = make_name("ITEM", rng.randrange(item_count))
+                qty, rate = rng.randint(1, 5), flt(rng.uniform(1, 500), 2)
+                total += qty * rate
+                lines.append(make_child_row(
+                    name, "Sales Invoice", "items", idx, item_code=item_code, item_name=item_code,
+                    qty=qty, stock_qty=qty, rate=rate, amount=qty * rate, net_amount=qty * rate,
+                    base_rate=rate, base_amount=qty * rate, base_net_amount=qty * rate,
+                    uom=context.uom, stock_uom=context.uom, conversion_factor=1,
+                    income_account=context.income_account, cost_center=context.cost_center, docstatus=1
+                ))
+
+            total = flt(total, 2)
+            outstanding = total if rng.random() < 0.3 else 0
+            invoices.append(make_row(
+                name, customer=customer, customer_name=customer, company=context.company,
+                posting_date=posting_date, posting_time="12:00:00", due_date=posting_date,
+                currency=context.currency, conversion_rate=1, selling_price_list=context.price_list,
+                price_list_currency=context.currency, plc_conversion_rate=1, debit_to=context.receivable_account,
+                total=total, net_total=total, base_total=total, base_net_total=total,
+                grand_total=total, base_grand_total=total, rounded_total=total, base_rounded_total=total,
+                outstanding_amount=outstanding, status="Unpaid" if outstanding else "Paid",
+                is_return=0, docstatus=1
+            ))
+
+        insert_rows("Sales Invoice", invoices)
+        insert_rows("Sales Invoice Item", lines)
+
+
+def seed_payment_entries(context, count, customer_count):
+    if not context.mode_of_payment:
+        return
+
+    start = get_existing("Payment Entry", "PE")
+    rng = random.Random(f"{SEED}-payments-{start}")
+    today = getdate(nowdate())
+
+    for chunk_start in range(start, count, 1000):
+        payments = []
+
+        for i in range(chunk_start, min(chunk_start + 1000, count)):
+            amount = flt(rng.uniform(10, 2000), 2)
+            payments.append(make_row(
+                make_name("PE", i), payment_type="Receive", party_type="Customer",
+                party=make_name("CUST", rng.randrange(customer_count)), company=context.company,
+                posting_date=add_days(today, -rng.randrange(365)), mode_of_payment=context.mode_of_payment,
+                paid_from=context.receivable_account, paid_to=context.cash_account,
+                paid_from_account_currency=context.currency, paid_to_account_currency=context.currency,
+                paid_amount=amount, received_amount=amount, base_paid_amount=amount, base_received_amount=amount,
+                source_exchange_rate=1, target_exchange_rate=1, docstatus=1
+            ))
+
+        insert_rows("Payment Entry", payments)
+
+
+def clear():
+    """Delete every generated row."""
+    for doctype, child_doctypes in (
+        ("Sales Invoice", ["Sales Invoice Item"]),
+        ("Payment Entry", []),
+        ("Item Price", []),
+        ("Item", ["Item Barcode", "Item Tax"]),
+        ("Address", ["Dynamic Link"]),
+        ("Customer", []),
+        ("Item Tax Template", ["Item Tax Template Detail"])
+    ):
+        for child_doctype in child_doctypes:
+            frappe.db.delete(child_doctype, {"parent": ["like", f"{PREFIX}-%"], "parenttype": doctype})
+        frappe.db.delete(doctype, {"name": ["like", f"{PREFIX}-%"]})
+
+    frappe.db.commit()
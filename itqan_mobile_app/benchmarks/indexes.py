@@ -0,0 +1,89 @@
+import statistics
+import time
+
+import frappe
+from frappe.utils import add_days, now, nowdate
+
+# Index added by the v0_1 patches and the query shape it serves
+CASES = [
+    ("mobile_item_tax_parent_idx", "Item Tax", """
+        SELECT parent, item_tax_template FROM `tabItem Tax` {hint}
+        WHERE parent IN %(items)s AND parenttype = 'Item'
+        ORDER BY idx ASC
+    """),
+    ("mobile_dynamic_link_lookup", "Dynamic Link", """
+        SELECT parent, link_name FROM `tabDynamic Link` {hint}
+        WHERE link_doctype = 'Customer' AND link_name IN %(customers)s AND parenttype = 'Address'
+    """),
+    ("mobile_si_docstatus_posting_date", "Sales Invoice", """
+        SELECT COUNT(*), SUM(base_grand_total) FROM `tabSales Invoice` {hint}
+        WHERE docstatus = 1 AND posting_date BETWEEN %(from_date)s AND %(to_date)s
+    """),
+    ("mobile_si_docstatus_status", "Sales Invoice", """
+        SELECT status, COUNT(*), SUM(outstanding_amount) FROM `tabSales Invoice` {hint}
+        WHERE docstatus = 1 AND status IN ('Overdue', 'Unpaid', 'Partly Paid')
+        GROUP BY status
+    """),
+    ("mobile_pe_docstatus_posting_mop", "Payment Entry", """
+        SELECT mode_of_payment, SUM(paid_amount) FROM `tabPayment Entry` {hint}
+        WHERE docstatus = 1 AND posting_date BETWEEN %(from_date)s AND %(to_date)s
+        GROUP BY mode_of_payment
+    """)
+]
+
+
+def run(repeat=20, output=None):
+    """Time each indexed query shape with its index ignored (before) and used (after).
+
+    bench --site <site> run-mobile-benchmarks --indexes --output indexes.json
+
+    Uses MariaDB's IGNORE INDEX hint, so nothing is dropped. Seed data first
+    with the benchmark generator for meaningful numbers.
+    """
+    values = {
+        "items": tuple(frappe.get_all("Item", pluck="name", limit_page_length=100)) or ("",),
+        "customers": tuple(frappe.get_all("Customer", pluck="name", limit_page_length=100)) or ("",),
+        "from_date": add_days(nowdate(), -30),
+        "to_date": nowdate()
+    }
+
+    results = []
+    for index_name, doctype, query in CASES:
+        if not frappe.db.has_index(f"tab{doctype}", index_name):
+            results.append({"index": index_name, "doctype": doctype, "error": "Index missing, run bench migrate"})
+            continue
+
+        before = measure(query.format(hint=f"IGNORE INDEX (`{index_name}`)"), values, repeat)
+        after = measure(query.format(hint=""), values, repeat)
+
+        results.append({
+            "index": index_name,
+            "doctype": doctype,
+            "before": before,
+            "after": after,
+            "speedup": round(before["ms_median"] / after["ms_median"], 2) if after["ms_median"] else None
+        })
+
+    report = {"site": frappe.local.site, "run_on": now(), "repeat": repeat, "results": results}
+
+    if output:
+        with open(output, "w") as f:
+            f.write(frappe.as_json(report))
+
+    return report
+
+
+def measure(query, values, repeat):
+    timings = []
+    for _i in range(repeat):
+        start = time.monotonic()
+        frappe.db.sql(query, values)
+        timings.append((time.monotonic() - start) * 1000)
+
+    plan = frappe.db.sql(f"EXPLAIN {query}", values, as_dict=True)
+
+    return {
+        "ms_median": round(statistics.median(timings), 3),
+        "ms_max": round(max(timings), 3),
+        "plan": [{"key": row.get("key"), "rows": row.get("rows"), "extra": row.get("Extra")} for row in plan]
+    }
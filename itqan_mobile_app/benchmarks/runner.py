@@ -0,0 +1,130 @@
+import json
+import statistics
+import time
+
+import frappe
+from frappe.utils import add_days, now, nowdate
+
+from itqan_mobile_app.benchmarks import generator
+from itqan_mobile_app.utils.cache import CACHE_PREFIX
+from itqan_mobile_app.utils.profiling import record_queries
+
+API_MODULE = "itqan_mobile_app.www.api"
+
+DEFAULT_SIZES = (100, 1000, 10000)
+DEFAULT_REPEAT = 5
+
+
+def get_cases(company):
+    """Endpoint name and arguments of every measured call."""
+    today = nowdate()
+    sample_invoice = {
+        "customer": generator.make_name("CUST", 0),
+        "items": [{"item_code": generator.make_name("ITEM", i), "qty": 1} for i in range(30)]
+    }
+
+    return [
+        ("get_items_details_list", {"page_length": 100}),
+        ("get_all_customers", {"page_length": 100}),
+        ("get_all_customers", {"search": "Benchmark Customer 1", "page_length": 100}),
+        ("get_all_sales_invoices", {"page_length": 100}),
+        ("get_sales_statistics", {"company": company}),
+        ("get_sales_statistics_timeseries", {
+            "from_date": add_days(today, -30), "to_date": today, "bucket": "day", "company": company
+        }),
+        ("get_mode_of_payments_list", {"company": company}),
+        ("get_tax_templates", {}),
+        ("sync_master_data", {"doctypes": ["Item", "Item Price", "Customer"], "page_length": 500}),
+        ("bootstrap", {"company": company}),
+        ("get_rates", {"items": [generator.make_name("ITEM", i) for i in range(100)]}),
+        ("lookup_item_by_barcode", {"code": f"{generator.PREFIX}{1:010d}"}),
+        ("preview_sales_invoice", {"data": json.dumps(sample_invoice)})
+    ]
+
+
+def run(sizes=DEFAULT_SIZES, repeat=DEFAULT_REPEAT, output=None, company=None):
+    """Seed each data size in turn and time every endpoint against it.
+
+    bench --site <site> run-mobile-benchmarks --sizes 100,1000 --output bench.json
+
+    The report is JSON with one entry per size and endpoint, stable enough to diff
+    between releases. The first call of each case runs with cold app caches and
+    is reported apart from the warm calls. Meant for a scratch site: it writes
+    benchmark rows and clears the app's caches.
+    """
+    company = company or frappe.db.get_single_value("Global Defaults", "default_company")
+    api = frappe.get_module(API_MODULE)
+
+    # The benchmark's own calls should not land in the production metrics
+    frappe.conf.mobile_api_instrumentation = 0
+
+    results = []
+    for size in sizes:
+        volumes = generator.seed(size, company)
+
+        for method, args in get_cases(company):
+            results.append(dict(
+                run_case(api, method, args, repeat),
+                size=size,
+                volumes=volumes,
+                method=method,
+                args=args
+            ))
+
+    report = {
+        "app_version": frappe.get_attr("itqan_mobile_app.__version__"),
+        "frappe_version": frappe.__version__,
+        "site": frappe.local.site,
+        "run_on": now(),
+        "repeat": repeat,
+        "results": results
+    }
+
+    if output:
+        with open(output, "w") as f:
+            f.write(frappe.as_json(report))
+
+    return report
+
+
+def run_case(api, method, args, repeat):
+    frappe.cache().delete_keys(f"{CACHE_PREFIX}|")
+    cold = measure(getattr(api, method), args)
+    warm = [measure(getattr(api, method), args) for _i in range(repeat)]
+    wall = sorted(sample["wall_ms"] for sample in warm)
+
+    return {
+        "cold": cold,
+        "wall_ms_median": round(statistics.median(wall), 2),
+        "wall_ms_max": wall[-1],
+        "queries": warm[-1]["queries"],
+        "query_ms_median": round(statistics.median(sample["query_ms"] for sample in warm), 2),
+        "rows": warm[-1]["rows"],
+        "error": cold["error"]
+    }
+
+
+def measure(fn, args):
+    # Every call is a fresh request as far as the request level caches go
+    frappe.local.mobile_request_cache = {}
+    frappe.local.response.pop("next_cursor", None)
+
+    error = None
+    start = time.monotonic()
+    with record_queries() as recorder:
+        try:
+            response = frappe.call(fn, **args)
+            if isinstance(response, dict) and response.get("status") == "error":
+                error = response.get("message")
+        except Exception as e:
+            error = str(e)
+
+    frappe.db.rollback()
+
+    return {
+        "wall_ms": round((time.monotonic() - start) * 1000, 2),
+        "queries": recorder.count,
+        "query_ms": round(recorder.duration * 1000, 2),
+        "rows": recorder.rows,
+        "error": error
+    }
@@ -0,0 +1,54 @@
+import click
+from frappe.commands import get_site, pass_context
+
+
+@click.command("rebuild-mobile-sales-rollups")
+@click.option("--from-date", help="First posting date to rebuild, defaults to the oldest submitted document")
+@click.option("--to-date", help="Last posting date to rebuild, defaults to today")
+@pass_context
+def rebuild_mobile_sales_rollups(context, from_date=None, to_date=None):
+	"Recompute the mobile sales rollups from submitted Sales Invoices and Payment Entries"
+	import frappe
+	from itqan_mobile_app.utils.rollups import rebuild_sales_rollups
+
+	site = get_site(context)
+	frappe.init(site=site)
+	frappe.connect()
+	try:
+		rebuild_sales_rollups(from_date, to_date)
+	finally:
+		frappe.destroy()
+
+
+@click.command("run-mobile-benchmarks")
+@click.option("--sizes", default="100,1000,10000", help="Comma separated data sizes, in items, to seed and measure")
+@click.option("--repeat", default=5, type=int, help="Warm calls per endpoint and size")
+@click.option("--output", help="Write the JSON report to this file")
+@click.option("--clear", is_flag=True, default=False, help="Delete the generated data instead of running")
+@click.option("--indexes", is_flag=True, default=False, help="Compare the patched indexes' query shapes with and without them")
+@pass_context
+def run_mobile_benchmarks(context, sizes, repeat, output=None, clear=False, indexes=False):
+	"Seed synthetic data and report latency and query counts of the mobile api"
+	import frappe
+	from itqan_mobile_app.benchmarks import generator, indexes as index_benchmarks, runner
+
+	site = get_site(context)
+	frappe.init(site=site)
+	frappe.connect()
+	try:
+		if clear:
+			generator.clear()
+			return
+
+		if indexes:
+			report = index_benchmarks.run(repeat, output)
+		else:
+			report = runner.run([int(size) for size in sizes.split(",")], repeat, output)
+
+		if not output:
+			print(frappe.as_json(report))
+	finally:
+		frappe.destroy()
+
+
+commands = [rebuild_mobile_sales_rollups, run_mobile_benchmarks]
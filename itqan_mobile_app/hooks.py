@@ -102,34 +102,59 @@ app_license = "MIT"
 # ---------------
 # Hook on document methods and events
 
-# doc_events = {
-#	"*": {
-#		"on_update": "method",
-#		"on_cancel": "method",
-#		"on_trash": "method"
-#	}
-# }
+doc_events = {
+	"*": {
+		"on_update": [
+			"itqan_mobile_app.utils.cache.invalidate_doc_cache",
+			"itqan_mobile_app.utils.offline_catalog.mark_catalogs_dirty"
+		],
+		"on_trash": [
+			"itqan_mobile_app.utils.sync.record_tombstone",
+			"itqan_mobile_app.utils.cache.invalidate_doc_cache",
+			"itqan_mobile_app.utils.offline_catalog.mark_catalogs_dirty"
+		],
+		"after_rename": [
+			"itqan_mobile_app.utils.sync.record_rename_tombstone",
+			"itqan_mobile_app.utils.cache.invalidate_doc_cache",
+			"itqan_mobile_app.utils.offline_catalog.mark_catalogs_dirty"
+		]
+	},
+	"Sales Invoice": {
+		"on_submit": "itqan_mobile_app.utils.rollups.on_sales_invoice_submit",
+		"on_cancel": "itqan_mobile_app.utils.rollups.on_sales_invoice_cancel"
+	},
+	"Payment Entry": {
+		"on_submit": "itqan_mobile_app.utils.rollups.on_payment_entry_submit",
+		"on_cancel": "itqan_mobile_app.utils.rollups.on_payment_entry_cancel"
+	},
+	"Item Price": {
+		"on_update": "itqan_mobile_app.utils.prices.update_price_index",
+		"on_trash": "itqan_mobile_app.utils.prices.update_price_index"
+	},
+	"Price List": {
+		"on_trash": "itqan_mobile_app.utils.prices.drop_price_index",
+		"after_rename": "itqan_mobile_app.utils.prices.drop_price_index"
+	},
+	"Item": {
+		"on_trash": "itqan_mobile_app.utils.prices.drop_price_index",
+		"after_rename": "itqan_mobile_app.utils.prices.drop_price_index"
+	}
+}
 
 # Scheduled Tasks
 # ---------------
 
-# scheduler_events = {
-#	"all": [
-#		"itqan_mobile_app.tasks.all"
-#	],
-#	"daily": [
-#		"itqan_mobile_app.tasks.daily"
-#	],
-#	"hourly": [
-#		"itqan_mobile_app.tasks.hourly"
-#	],
-#	"weekly": [
-#		"itqan_mobile_app.tasks.weekly"
-#	],
-#	"monthly": [
-#		"itqan_mobile_app.tasks.monthly"
-#	],
-# }
+scheduler_events = {
+	"all": [
+		"itqan_mobile_app.utils.offline_catalog.refresh_offline_catalogs",
+		"itqan_mobile_app.utils.submit_queue.resume_submit_jobs"
+	],
+	"daily": [
+		"itqan_mobile_app.utils.idempotency.purge_expired_keys",
+		"itqan_mobile_app.utils.sync.purge_tombstones",
+		"itqan_mobile_app.utils.submit_queue.purge_submit_jobs"
+	]
+}
 
 # Testing
 # -------
@@ -162,7 +187,10 @@ app_license = "MIT"
 # Request Events
 # ----------------
 # before_request = ["itqan_mobile_app.utils.before_request"]
-# after_request = ["itqan_mobile_app.utils.after_request"]
+after_request = [
+	"itqan_mobile_app.utils.etag.set_etag_headers",
+	"itqan_mobile_app.utils.instrumentation.record_response_size"
+]
 
 # Job Events
 # ----------
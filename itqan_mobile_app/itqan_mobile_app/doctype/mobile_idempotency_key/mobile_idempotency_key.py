@@ -0,0 +1,16 @@
+# Copyright (c) 2026, Itqan and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.model.document import Document
+
+
+class MobileIdempotencyKey(Document):
+	pass
+
+
+def on_doctype_update():
+	# One reservation per endpoint, key and user, however the row is named
+	frappe.db.add_unique(
+		"Mobile Idempotency Key", ["endpoint", "idempotency_key", "owner"], "mobile_idempotency_key_unique"
+	)
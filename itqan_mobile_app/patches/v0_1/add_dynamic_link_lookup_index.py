@@ -0,0 +1,6 @@
+import frappe
+
+
+def execute():
+	# Addresses of a page of customers: link_doctype = 'Customer' AND link_name IN (...)
+	frappe.db.add_index("Dynamic Link", ["link_doctype", "link_name", "parent"], "mobile_dynamic_link_lookup")
@@ -0,0 +1,6 @@
+import frappe
+
+
+def execute():
+	# Scanner lookups by supplier part number: supplier_part_no = %s
+	frappe.db.add_index("Item Supplier", ["supplier_part_no"], "mobile_item_supplier_part_no")
@@ -0,0 +1,6 @@
+import frappe
+
+
+def execute():
+	# First item tax template per item: parent IN (...) ORDER BY idx
+	frappe.db.add_index("Item Tax", ["parent", "idx"], "mobile_item_tax_parent_idx")
@@ -0,0 +1,8 @@
+import frappe
+
+
+def execute():
+	# Submitted payments by posting date range, grouped by mode of payment, for the rollup rebuild
+	frappe.db.add_index(
+		"Payment Entry", ["docstatus", "posting_date", "mode_of_payment"], "mobile_pe_docstatus_posting_mop"
+	)
@@ -0,0 +1,7 @@
+import frappe
+
+
+def execute():
+	# Submitted invoices by posting date range for the rollup rebuild, and by status for the live overdue totals
+	frappe.db.add_index("Sales Invoice", ["docstatus", "posting_date"], "mobile_si_docstatus_posting_date")
+	frappe.db.add_index("Sales Invoice", ["docstatus", "status"], "mobile_si_docstatus_status")
@@ -0,0 +1,12 @@
+import frappe
+
+
+def execute():
+	# The rollups only follow submits made after install, fill in the history once.
+	# Runs one month per transaction, so it goes to a worker rather than holding up migrate
+	frappe.enqueue(
+		"itqan_mobile_app.utils.rollups.rebuild_sales_rollups",
+		queue="long",
+		timeout=6 * 60 * 60,
+		enqueue_after_commit=True
+	)
@@ -0,0 +1,17 @@
+import frappe
+
+
+def execute():
+	# Hash naming let retries insert a second row for the same key; keep the oldest
+	# so the unique index added on doctype sync can be created
+	if not frappe.db.table_exists("Mobile Idempotency Key"):
+		return
+
+	frappe.db.sql("""
+		DELETE newer FROM `tabMobile Idempotency Key` newer
+		JOIN `tabMobile Idempotency Key` older
+			ON older.endpoint = newer.endpoint
+			AND older.idempotency_key = newer.idempotency_key
+			AND older.owner = newer.owner
+			AND (older.creation < newer.creation OR (older.creation = newer.creation AND older.name < newer.name))
+	""")
@@ -0,0 +1,36 @@
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import set_request
+
+from itqan_mobile_app.utils.idempotency import IDEMPOTENCY_DOCTYPE, IDEMPOTENCY_HEADER
+from itqan_mobile_app.www import api
+
+CUSTOMER_NAME = "_Test Mobile Idempotent Customer"
+
+
+class TestIdempotency(FrappeTestCase):
+    def tearDown(self):
+        frappe.local.request = None
+        frappe.local.form_dict = frappe._dict()
+        frappe.db.rollback()
+
+    def create_customer(self, key):
+        set_request(method="POST", path="/api/method/create_customer", headers={IDEMPOTENCY_HEADER: key})
+        frappe.local.response = frappe._dict()
+        return api.create_customer(CUSTOMER_NAME, "+96500000000", "Block 1")
+
+    def test_retry_with_same_key_creates_one_document(self):
+        first = self.create_customer("test-retry-key")
+        second = self.create_customer("test-retry-key")
+
+        self.assertEqual(first["status"], "success")
+        self.assertEqual(second, first)
+        self.assertEqual(frappe.local.response.get("idempotent_replay"), 1)
+        self.assertEqual(frappe.db.count("Customer", {"customer_name": CUSTOMER_NAME}), 1)
+        self.assertEqual(frappe.db.count(IDEMPOTENCY_DOCTYPE, {"idempotency_key": "test-retry-key"}), 1)
+
+    def test_different_keys_create_separate_documents(self):
+        self.create_customer("test-key-1")
+        self.create_customer("test-key-2")
+
+        self.assertEqual(frappe.db.count("Customer", {"customer_name": CUSTOMER_NAME}), 2)
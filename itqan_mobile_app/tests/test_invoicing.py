@@ -0,0 +1,220 @@
+import json
+import unittest
+
+import frappe
+import redis
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import flt
+
+from itqan_mobile_app.utils.invoicing import build_sales_invoice, get_invoice_context
+from itqan_mobile_app.utils.prices import build_price_index, get_index_key
+
+PRICE_LIST = "_Test Mobile Selling"
+CUSTOMER = "_Test Mobile Customer"
+ITEM_RATES = {"_Test Mobile Item 1": 100, "_Test Mobile Item 2": 250, "_Test Mobile Item 3": 40}
+
+TOTAL_FIELDS = ("total", "net_total", "total_taxes_and_charges", "grand_total", "rounded_total")
+
+
+def build_sales_invoice_per_line(data, calculate=True):
+    """The builder create_sales_invoice used before the prefetch, one lookup per line."""
+    item_rows = []
+    tax_map = {}
+
+    for item in data["items"]:
+        item_price = item.get("rate") or frappe.db.get_value("Item Price", {
+            "item_code": item["item_code"],
+            "selling": 1,
+        }, "price_list_rate")
+
+        row = {"item_code": item["item_code"], "qty": item.get("qty", 1), "rate": item_price}
+
+        if item.get("item_tax_template"):
+            row["item_tax_template"] = item["item_tax_template"]
+
+            tax_details = frappe.db.sql(
+                """
+                SELECT tax_type, tax_rate
+                FROM `tabItem Tax Template Detail`
+                WHERE parent=%s
+            """,
+                (item["item_tax_template"],),
+                as_dict=True,
+            )
+
+            for td in tax_details:
+                tax_map.setdefault(td.tax_type, {})[item["item_code"]] = [td.tax_rate, td.tax_rate]
+        else:
+            row["item_tax_template"] = ""
+            row["item_tax_rate"] = frappe.as_json({})
+
+        item_rows.append(row)
+
+    invoice = frappe.get_doc({
+        "doctype": "Sales Invoice",
+        "customer": data["customer"],
+        "items": item_rows,
+        "taxes_and_charges": data.get("taxes_and_charges"),
+    })
+
+    for account_head, details in tax_map.items():
+        invoice.append("taxes", {
+            "charge_type": "On Net Total",
+            "account_head": account_head,
+            "rate": 0,
+            "item_wise_tax_detail": frappe.as_json(details),
+            "cost_center": data.get("cost_center"),
+            "description": f"Tax for {account_head}",
+        })
+
+    if data.get("taxes_and_charges"):
+        tax_template = frappe.get_doc("Sales Taxes and Charges Template", data["taxes_and_charges"])
+        for tax in tax_template.taxes:
+            invoice.append("taxes", {
+                "charge_type": tax.charge_type,
+                "account_head": tax.account_head,
+                "description": tax.description,
+                "cost_center": tax.cost_center,
+                "rate": tax.rate,
+                "tax_amount": tax.tax_amount,
+                "included_in_print_rate": tax.included_in_print_rate,
+                "row_id": tax.row_id
+            })
+
+    if calculate:
+        invoice.run_method("calculate_taxes_and_totals")
+
+    return invoice
+
+
+class TestInvoicing(FrappeTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        company = frappe.db.get_single_value("Global Defaults", "default_company")
+        accounts = frappe.get_all(
+            "Account",
+            filters={"company": company, "account_type": "Tax", "is_group": 0},
+            pluck="name",
+            limit=2
+        )
+        if len(accounts) < 2:
+            raise unittest.SkipTest("The default company needs two tax accounts")
+
+        if not frappe.db.exists("Price List", PRICE_LIST):
+            frappe.get_doc({
+                "doctype": "Price List",
+                "price_list_name": PRICE_LIST,
+                "currency": frappe.get_cached_value("Company", company, "default_currency"),
+                "selling": 1
+            }).insert()
+
+        for item_code, rate in ITEM_RATES.items():
+            if not frappe.db.exists("Item", item_code):
+                frappe.get_doc({
+                    "doctype": "Item",
+                    "item_code": item_code,
+                    "item_group": "All Item Groups",
+                    "stock_uom": "Nos",
+                    "is_stock_item": 0
+                }).insert()
+
+            frappe.get_doc({
+                "doctype": "Item Price",
+                "item_code": item_code,
+                "price_list": PRICE_LIST,
+                "price_list_rate": rate
+            }).insert()
+
+        cls.single_tax = make_item_tax_template("_Test Mobile Single Tax", company, {accounts[0]: 5})
+        cls.double_tax = make_item_tax_template("_Test Mobile Double Tax", company, {accounts[0]: 10, accounts[1]: 2})
+
+        cls.taxes_and_charges = frappe.get_doc({
+            "doctype": "Sales Taxes and Charges Template",
+            "title": "_Test Mobile Sales Taxes",
+            "company": company,
+            "taxes": [{
+                "charge_type": "On Net Total",
+                "account_head": accounts[1],
+                "description": "VAT",
+                "rate": 5
+            }]
+        }).insert().name
+
+        # Prices reach the index after commit, build it from this transaction instead
+        build_price_index(PRICE_LIST)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        redis.Redis.delete(frappe.cache(), get_index_key(PRICE_LIST))
+
+    def test_repeated_item_tax_templates(self):
+        self.assertMatchesPerLine({
+            "items": [
+                {"item_code": "_Test Mobile Item 1", "qty": 2, "item_tax_template": self.single_tax},
+                {"item_code": "_Test Mobile Item 2", "qty": 1, "item_tax_template": self.single_tax},
+                {"item_code": "_Test Mobile Item 3", "qty": 3, "item_tax_template": self.double_tax},
+                {"item_code": "_Test Mobile Item 2", "qty": 1, "item_tax_template": self.double_tax}
+            ]
+        })
+
+    def test_lines_with_and_without_template(self):
+        self.assertMatchesPerLine({
+            "items": [
+                {"item_code": "_Test Mobile Item 1", "qty": 1, "item_tax_template": self.double_tax},
+                {"item_code": "_Test Mobile Item 2", "qty": 4},
+                {"item_code": "_Test Mobile Item 3", "qty": 1, "rate": 55}
+            ]
+        })
+
+    def test_taxes_and_charges_template(self):
+        self.assertMatchesPerLine({
+            "taxes_and_charges": self.taxes_and_charges,
+            "items": [
+                {"item_code": "_Test Mobile Item 1", "qty": 1, "item_tax_template": self.single_tax},
+                {"item_code": "_Test Mobile Item 3", "qty": 2}
+            ]
+        })
+
+    def assertMatchesPerLine(self, data):
+        data = dict(data, customer=CUSTOMER, selling_price_list=PRICE_LIST)
+
+        # As built, before the totals rewrite item_wise_tax_detail
+        self.assertEqual(
+            get_tax_rows(build_sales_invoice(data, get_invoice_context([data]), defer_totals=True)),
+            get_tax_rows(build_sales_invoice_per_line(data, calculate=False))
+        )
+
+        invoice = build_sales_invoice(data, get_invoice_context([data]))
+        expected = build_sales_invoice_per_line(data)
+
+        self.assertEqual(get_tax_rows(invoice), get_tax_rows(expected))
+        self.assertEqual(get_item_rows(invoice), get_item_rows(expected))
+        for fieldname in TOTAL_FIELDS:
+            self.assertEqual(flt(invoice.get(fieldname)), flt(expected.get(fieldname)), fieldname)
+
+
+def make_item_tax_template(title, company, rates):
+    return frappe.get_doc({
+        "doctype": "Item Tax Template",
+        "title": title,
+        "company": company,
+        "taxes": [{"tax_type": account, "tax_rate": rate} for account, rate in rates.items()]
+    }).insert().name
+
+
+def get_tax_rows(invoice):
+    return [(
+        tax.charge_type,
+        tax.account_head,
+        flt(tax.rate),
+        json.loads(tax.item_wise_tax_detail or "{}"),
+        flt(tax.tax_amount),
+        flt(tax.total)
+    ) for tax in invoice.taxes]
+
+
+def get_item_rows(invoice):
+    return [(row.item_code, flt(row.qty), flt(row.rate), flt(row.net_amount)) for row in invoice.items]
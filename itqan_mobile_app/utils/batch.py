@@ -0,0 +1,102 @@
+import json
+
+import frappe
+from frappe import _
+
+API_MODULE = "itqan_mobile_app.www.api"
+
+MAX_BATCH_CALLS = 30
+
+# Read-only endpoints of `itqan_mobile_app.www.api` that may run inside a batch
+BATCH_METHODS = frozenset((
+    "get_user_profile",
+    "get_default_company",
+    "get_default_country",
+    "get_defaults_company_currency",
+    "get_mode_of_payments_list",
+    "get_tax_templates",
+    "get_paid_to_accounts_query",
+    "get_paid_from_accounts_query",
+    "get_exchange_rate",
+    "get_conversion_factor",
+    "get_party_account",
+    "get_all_customers",
+    "get_items_details_list",
+    "lookup_item_by_barcode",
+    "get_rates",
+    "get_all_sales_invoices",
+    "get_all_material_requests",
+    "get_sales_invoice_details",
+    "preview_sales_invoice",
+    "get_sales_statistics",
+    "get_submit_job_status",
+    "get_sales_statistics_timeseries",
+    "sync_master_data",
+    "get_doctype_list",
+    "get_items_list",
+    "get_payment_entries_list",
+    "get_sales_invoices_list",
+    "get_purchase_invoices_list",
+    "get_bank_accounts_list",
+    "get_accounts_list",
+    "get_employees_list",
+    "get_suppliers_list",
+    "get_shareholders_list",
+    "get_customers_list",
+    "get_currencies_list",
+    "get_price_lists_list",
+    "get_uoms_list",
+    "get_sales_persons_list",
+    "get_sales_taxes_templates_list",
+    "get_purchase_taxes_templates_list",
+    "get_addresses_list",
+    "get_contacts_list",
+    "get_payment_terms_templates_list",
+    "get_payment_terms_list",
+    "get_terms_and_conditions_list",
+    "get_cost_centers_list",
+    "get_projects_list",
+    "get_warehouses"
+))
+
+
+def run_batch(calls):
+    """Run several api calls in this request, returning one result or error per call, in order."""
+    if isinstance(calls, str):
+        calls = json.loads(calls)
+
+    if len(calls) > MAX_BATCH_CALLS:
+        frappe.throw(_("A batch can hold at most {0} calls").format(MAX_BATCH_CALLS))
+
+    api = frappe.get_module(API_MODULE)
+
+    frappe.flags.in_mobile_batch = True
+    try:
+        return [run_call(api, call) for call in calls]
+    finally:
+        frappe.flags.in_mobile_batch = False
+
+
+def run_call(api, call):
+    method = (call.get("method") or "").removeprefix(f"{API_MODULE}.")
+    args = call.get("args") or {}
+    if isinstance(args, str):
+        args = json.loads(args)
+
+    if method not in BATCH_METHODS:
+        return {"method": method, "status": "error", "message": _("{0} cannot be called in a batch").format(method)}
+
+    # List endpoints report their continuation token on the response
+    frappe.response.pop("next_cursor", None)
+
+    try:
+        message = frappe.call(getattr(api, method), **args)
+    except Exception as e:
+        frappe.clear_messages()
+        return {"method": method, "status": "error", "message": str(e)}
+
+    result = {"method": method, "status": "success", "message": message}
+    if "next_cursor" in frappe.response:
+        result["next_cursor"] = frappe.response.pop("next_cursor")
+
+    return result
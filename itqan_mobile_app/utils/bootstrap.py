@@ -0,0 +1,70 @@
+import hashlib
+
+import frappe
+from frappe.utils import now
+
+from itqan_mobile_app.utils.cache import get_cached, make_cache_key
+from itqan_mobile_app.utils.loaders import get_all_with_children
+from itqan_mobile_app.utils.payments import get_mode_of_payments
+
+# Bump when the snapshot layout changes so stored snapshots are rebuilt
+SNAPSHOT_FORMAT = 1
+
+
+def get_bootstrap_snapshot(company=None):
+    """Everything the POS screen needs at startup, stored per company and permission profile.
+
+    The snapshot is rebuilt only after one of the doctypes it reads changes,
+    see `INVALIDATES` in utils.cache.
+    """
+    company = company or frappe.db.get_single_value("Global Defaults", "default_company")
+
+    return get_cached(
+        "bootstrap",
+        SNAPSHOT_FORMAT,
+        lambda: build_bootstrap_snapshot(company),
+        company=company,
+        scope="permissions"
+    )
+
+
+def build_bootstrap_snapshot(company):
+    data = {
+        "company": company,
+        "currency": frappe.get_cached_value("Company", company, "default_currency") if company else None,
+        "country": frappe.db.get_single_value("System Settings", "country"),
+        "warehouses": frappe.get_list(
+            "Warehouse",
+            filters={"company": company, "is_group": 0, "disabled": 0},
+            pluck="name",
+            order_by="name asc"
+        ),
+        "price_lists": frappe.get_list(
+            "Price List",
+            filters={"selling": 1, "enabled": 1},
+            fields=["name", "currency"],
+            order_by="name asc"
+        ),
+        "uoms": frappe.get_list("UOM", filters={"enabled": 1}, pluck="name", order_by="name asc"),
+        "modes_of_payment": get_mode_of_payments(company, {"enabled": 1}),
+        "tax_templates": get_all_with_children(
+            "Sales Taxes and Charges Template",
+            fields=["name", "title", "is_default"],
+            children={"taxes": ["charge_type", "account_head", "description", "rate"]},
+            filters={"company": company, "disabled": 0},
+            order_by="creation desc",
+            check_permissions=True
+        ),
+        "cost_centers": frappe.get_list(
+            "Cost Center",
+            filters={"company": company, "is_group": 0, "disabled": 0},
+            pluck="name",
+            order_by="name asc"
+        )
+    }
+
+    return {
+        "version": hashlib.md5(make_cache_key(data).encode("utf-8")).hexdigest(),
+        "built_on": now(),
+        "data": data
+    }
@@ -0,0 +1,164 @@
+import functools
+import hashlib
+import json
+
+import frappe
+import redis
+
+CACHE_PREFIX = "itqan_mobile_app"
+STATS_KEY = f"{CACHE_PREFIX}|stats"
+GENERATIONS_KEY = f"{CACHE_PREFIX}|generations"
+
+DEFAULT_TTL = 6 * 60 * 60
+
+# Cache namespaces to clear when a document of the doctype is saved, renamed or deleted.
+# Registry lists (`list:<doctype>`) are added by `get_invalidated_namespaces`.
+INVALIDATES = {
+    "Account": ["accounts", "bootstrap"],
+    "Company": ["accounts", "company_defaults", "mode_of_payments", "bootstrap"],
+    "Global Defaults": ["company_defaults", "bootstrap"],
+    "System Settings": ["company_defaults", "bootstrap"],
+    "Mode of Payment": ["mode_of_payments", "bootstrap"],
+    "Warehouse": ["bootstrap"],
+    "Price List": ["bootstrap"],
+    "UOM": ["bootstrap"],
+    "Sales Taxes and Charges Template": ["bootstrap", "tax_templates"],
+    "Item Tax Template": ["item_tax_templates", "item_lookup"],
+    "Item": ["item_lookup"],
+    "Cost Center": ["bootstrap"],
+    "Selling Settings": ["company_defaults"]
+}
+
+
+def get_cached(namespace, key, generator, ttl=DEFAULT_TTL, company=None, scope=None, cache_none=True):
+    """Read a value from the site's Redis cache, building and storing it on a miss.
+
+    Keys are namespaced by `namespace`, `company` and, when `scope` is set, by the
+    user ("user") or by what the user is allowed to see ("permissions").
+    Frappe already prefixes every key with the site. Values read once are also
+    kept for the rest of the request, so batched calls share them. With
+    `cache_none` unset, a None result is not stored and is built again next time.
+    """
+    cache_key = make_namespaced_key(namespace, company, get_scope_key(scope), key)
+    request_cache = get_request_cache()
+
+    if cache_key in request_cache:
+        return request_cache[cache_key]
+
+    cached = frappe.cache().get_value(cache_key)
+
+    if cached is not None:
+        count_lookup(namespace, hit=True)
+        # Values are wrapped so a cached None is told apart from a miss
+        value = cached[0]
+    else:
+        count_lookup(namespace, hit=False)
+        value = generator()
+        if value is not None or cache_none:
+            frappe.cache().set_value(cache_key, (value,), expires_in_sec=ttl)
+
+    request_cache[cache_key] = value
+    return value
+
+
+def get_request_cache():
+    if getattr(frappe.local, "mobile_request_cache", None) is None:
+        frappe.local.mobile_request_cache = {}
+
+    return frappe.local.mobile_request_cache
+
+
+def get_request_cached(key, generator):
+    """Memoize `generator()` for the rest of the current request or job."""
+    request_cache = get_request_cache()
+    if key not in request_cache:
+        request_cache[key] = generator()
+
+    return request_cache[key]
+
+
+def make_namespaced_key(namespace, company, scope, key):
+    generation = get_generation(namespace)
+    return f"{CACHE_PREFIX}|{namespace}|{generation}|{company or ''}|{scope or ''}|{make_cache_key(key)}"
+
+
+def get_generation(namespace):
+    # Plain integers, read them without the wrapper's unpickling
+    return get_request_cached(
+        ("cache_generation", namespace),
+        lambda: int(redis.Redis.hget(frappe.cache(), frappe.cache().make_key(GENERATIONS_KEY), namespace) or 0)
+    )
+
+
+def make_cache_key(*parts):
+    return json.dumps(parts, sort_keys=True, default=str)
+
+
+def get_scope_key(scope):
+    if not scope:
+        return None
+
+    user = frappe.session.user
+    if scope == "user" or user == "Administrator":
+        return user
+
+    return get_request_cached(("permission_profile", user), lambda: get_permission_profile(user))
+
+
+def get_permission_profile(user):
+    from frappe.core.doctype.user_permission.user_permission import get_user_permissions
+
+    # Users with the same roles and user permissions see the same rows and share entries
+    profile = make_cache_key(sorted(frappe.get_roles(user)), get_user_permissions(user))
+    return hashlib.md5(profile.encode("utf-8")).hexdigest()
+
+
+def clear_namespace(namespace):
+    """Move the namespace to a new generation; entries of the old one are left to expire."""
+    generation = frappe.cache().hincrby(frappe.cache().make_key(GENERATIONS_KEY), namespace, 1)
+
+    request_cache = get_request_cache()
+    request_cache[("cache_generation", namespace)] = generation
+
+    prefix = f"{CACHE_PREFIX}|{namespace}|"
+    for key in [k for k in request_cache if isinstance(k, str) and k.startswith(prefix)]:
+        del request_cache[key]
+
+
+def get_invalidated_namespaces(doctype):
+    from itqan_mobile_app.utils.list_registry import LIST_SPECS
+
+    namespaces = list(INVALIDATES.get(doctype, []))
+    if LIST_SPECS.get(doctype, {}).get("cache_ttl"):
+        namespaces.append(f"list:{doctype}")
+
+    return namespaces
+
+
+def invalidate_doc_cache(doc, method=None, *args, **kwargs):
+    for namespace in get_invalidated_namespaces(doc.doctype):
+        clear_namespace(namespace)
+
+        # Readers between the first bump and the commit still see and cache the old rows
+        frappe.db.after_commit.add(functools.partial(clear_namespace, namespace))
+
+
+def count_lookup(namespace, hit):
+    stat = f"{namespace}:{'hits' if hit else 'misses'}"
+    frappe.cache().hincrby(frappe.cache().make_key(STATS_KEY), stat, 1)
+
+
+def get_stats():
+    # Counters are plain integers, read them without the wrapper's unpickling
+    counters = redis.Redis.hgetall(frappe.cache(), frappe.cache().make_key(STATS_KEY))
+
+    stats = {}
+    for stat, count in (counters or {}).items():
+        namespace, kind = frappe.safe_decode(stat).rsplit(":", 1)
+        stats.setdefault(namespace, {"hits": 0, "misses": 0})[kind] = int(count)
+
+    for counts in stats.values():
+        total = counts["hits"] + counts["misses"]
+        counts["hit_rate"] = round(counts["hits"] / total, 4) if total else 0
+
+    return stats
@@ -0,0 +1,156 @@
+import frappe
+
+from itqan_mobile_app.utils.cache import get_cached
+from itqan_mobile_app.utils.pagination import get_page
+from itqan_mobile_app.utils.prices import get_price_list_rates, get_rates
+
+ITEM_FIELDS = ["name", "item_name", "item_group", "image", "stock_uom"]
+
+
+def get_items_details(filters=None, cursor=None, page_length=None):
+    # One query for the items page plus one per related table, whatever the page size
+    items, next_cursor = get_page("Item", ITEM_FIELDS, filters, cursor, page_length)
+
+    return build_items_details(items), next_cursor
+
+
+def build_items_details(items):
+    item_codes = [item["name"] for item in items]
+
+    rates = get_price_list_rates(item_codes)
+    barcodes = get_barcodes(item_codes)
+    item_tax_templates = get_item_tax_templates(item_codes)
+    tax_details = get_first_tax_details(set(item_tax_templates.values()))
+
+    result = []
+    for item in items:
+        tax_template = item_tax_templates.get(item["name"])
+        tax_detail = tax_details.get(tax_template) or {}
+
+        result.append({
+            "name": item["name"],
+            "item_name": item["item_name"],
+            "item_group": item["item_group"],
+            "image": item["image"],
+            "stock_uom": item["stock_uom"],
+            "standard_rate": rates.get(item["name"], 0),
+            "barcodes": barcodes.get(item["name"], []),
+            "item_tax_template": tax_template,
+            "tax_account": tax_detail.get("tax_type"),
+            "tax_rate": tax_detail.get("tax_rate", 0)
+        })
+
+    return result
+
+
+def get_barcodes(item_codes):
+    if not item_codes:
+        return {}
+
+    rows = frappe.get_all(
+        "Item Barcode",
+        filters={"parent": ["in", item_codes], "parenttype": "Item"},
+        fields=["parent", "barcode"],
+        order_by="idx asc"
+    )
+
+    barcodes = {}
+    for row in rows:
+        barcodes.setdefault(row.parent, []).append(row.barcode)
+
+    return barcodes
+
+
+def get_item_tax_templates(item_codes):
+    """First `Item Tax` template per item code."""
+    if not item_codes:
+        return {}
+
+    rows = frappe.get_all(
+        "Item Tax",
+        filters={"parent": ["in", item_codes], "parenttype": "Item"},
+        fields=["parent", "item_tax_template"],
+        order_by="idx asc"
+    )
+
+    templates = {}
+    for row in rows:
+        templates.setdefault(row.parent, row.item_tax_template)
+
+    return templates
+
+
+def get_first_tax_details(tax_templates):
+    """First `Item Tax Template Detail` row per template."""
+    tax_templates = [t for t in tax_templates if t]
+    if not tax_templates:
+        return {}
+
+    rows = frappe.get_all(
+        "Item Tax Template Detail",
+        filters={"parent": ["in", tax_templates]},
+        fields=["parent", "tax_type", "tax_rate"],
+        order_by="idx asc"
+    )
+
+    details = {}
+    for row in rows:
+        details.setdefault(row.parent, {"tax_type": row.tax_type, "tax_rate": row.tax_rate})
+
+    return details
+
+
+def lookup_item(code, price_list=None):
+    """Item card for a scanned barcode, item code or supplier part number, or None.
+
+    The card is cached per code and cleared when an Item or Item Tax Template
+    changes; the rate is read from the price index on every scan, so price
+    edits show up without clearing it. Misses are not cached, so a barcode
+    added after a failed scan is found on the next one.
+    """
+    card = get_cached("item_lookup", code, lambda: get_item_card(code), cache_none=False)
+    if not card:
+        return None
+
+    rate = get_rates([{"item_code": card["name"], "uom": card["uom"]}], price_list)[0]["rate"]
+    if rate is None and card["uom"] != card["stock_uom"]:
+        rate = get_rates([card["name"]], price_list)[0]["rate"]
+
+    return dict(card, standard_rate=rate or 0)
+
+
+def get_item_card(code):
+    match = find_item_by_code(code)
+    if not match:
+        return None
+
+    items = frappe.get_all("Item", filters={"name": match.item_code, "disabled": 0}, fields=ITEM_FIELDS)
+    if not items:
+        return None
+
+    card = build_items_details(items)[0]
+    card["uom"] = match.uom or card["stock_uom"]
+    card["matched_by"] = match.matched_by
+
+    return card
+
+
+def find_item_by_code(code):
+    # One round trip over the three unique-ish keys a scanner can produce, best match first
+    matches = frappe.db.sql("""
+        SELECT parent AS item_code, uom, 'barcode' AS matched_by, 1 AS priority
+        FROM `tabItem Barcode`
+        WHERE barcode = %(code)s AND parenttype = 'Item'
+        UNION ALL
+        SELECT name, NULL, 'item_code', 2
+        FROM `tabItem`
+        WHERE name = %(code)s
+        UNION ALL
+        SELECT parent, NULL, 'supplier_part_no', 3
+        FROM `tabItem Supplier`
+        WHERE supplier_part_no = %(code)s AND parenttype = 'Item'
+        ORDER BY priority
+        LIMIT 1
+    """, {"code": code}, as_dict=True)
+
+    return matches[0] if matches else None
@@ -0,0 +1,72 @@
+import re
+
+import frappe
+
+from itqan_mobile_app.utils.pagination import get_page
+
+PHONE_PATTERN = re.compile(r"^\+?[\d\s\-()]+$")
+
+
+def get_customers_with_address(search=None, cursor=None, page_length=None):
+    filters = []
+    if search:
+        # Digits search the mobile number, anything else the customer name
+        field = "mobile_no" if PHONE_PATTERN.match(search) else "customer_name"
+        filters.append([field, "like", f"%{search}%"])
+
+    customers, next_cursor = get_page(
+        "Customer",
+        ["name", "customer_name", "mobile_no"],
+        filters,
+        cursor,
+        page_length,
+        check_permissions=False
+    )
+
+    addresses = get_primary_addresses([cust.name for cust in customers])
+
+    result = []
+    for cust in customers:
+        address = addresses.get(cust.name) or {}
+
+        result.append({
+            "customer_id": cust.name,
+            "customer_name": cust.customer_name,
+            "phone": cust.mobile_no,
+            "address_line1": address.get("address_line1"),
+            "city": address.get("city"),
+            "country": address.get("country")
+        })
+
+    return result, next_cursor
+
+
+def get_primary_addresses(customers):
+    """One address per customer, all fetched with a single join.
+
+    The customer's `customer_primary_address` wins, then addresses flagged as
+    primary, then billing addresses, then the oldest one.
+    """
+    if not customers:
+        return {}
+
+    rows = frappe.db.sql("""
+        SELECT dl.link_name, addr.name AS address, addr.address_line1, addr.city, addr.country
+        FROM `tabAddress` addr
+        JOIN `tabDynamic Link` dl ON dl.parent = addr.name AND dl.parenttype = 'Address'
+        JOIN `tabCustomer` cust ON cust.name = dl.link_name
+        WHERE dl.link_doctype = 'Customer' AND dl.link_name IN %(customers)s
+            AND addr.disabled = 0
+        ORDER BY
+            addr.name = cust.customer_primary_address DESC,
+            addr.is_primary_address DESC,
+            addr.address_type = 'Billing' DESC,
+            addr.creation ASC,
+            addr.name ASC
+    """, {"customers": customers}, as_dict=True)
+
+    addresses = {}
+    for row in rows:
+        addresses.setdefault(row.link_name, row)
+
+    return addresses
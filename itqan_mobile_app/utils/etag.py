@@ -0,0 +1,62 @@
+import hashlib
+
+import frappe
+
+from itqan_mobile_app.utils.cache import make_cache_key
+
+
+def get_doctype_version(doctype, filters=None, *salt):
+    """Version tag of the rows matching `filters`, from one aggregate query.
+
+    Any insert, update or delete moves either the latest `modified` or the row
+    count. `salt` holds whatever else shapes the response, like the fields or
+    page requested.
+    """
+    version = frappe.get_all(
+        doctype,
+        filters=filters,
+        fields=["max(modified) as last_modified", "count(name) as row_count"]
+    )[0]
+
+    return make_version_tag(doctype, filters, version.last_modified, version.row_count, *salt)
+
+
+def make_version_tag(*parts):
+    key = make_cache_key(frappe.session.user, *parts)
+    return hashlib.md5(key.encode("utf-8")).hexdigest()
+
+
+def conditional_response(tag, builder):
+    """Answer 304 Not Modified when the client already has `tag`, else build the response."""
+    if frappe.flags.in_mobile_batch:
+        # The request's If-None-Match belongs to the batch, not to the calls inside it
+        return builder()
+
+    frappe.local.mobile_etag = tag
+
+    if tag in get_request_etags():
+        frappe.local.mobile_not_modified = True
+        return None
+
+    return builder()
+
+
+def get_request_etags():
+    header = frappe.get_request_header("If-None-Match") if frappe.request else None
+    if not header:
+        return []
+
+    return [t.strip().removeprefix("W/").strip('"') for t in header.split(",")]
+
+
+def set_etag_headers(response=None, request=None):
+    tag = getattr(frappe.local, "mobile_etag", None)
+    if not tag or response is None:
+        return
+
+    response.headers["ETag"] = f'"{tag}"'
+    response.headers["Cache-Control"] = "private, no-cache"
+
+    if getattr(frappe.local, "mobile_not_modified", False):
+        response.status_code = 304
+        response.set_data(b"")
@@ -0,0 +1,119 @@
+import functools
+import hashlib
+import json
+
+import frappe
+from frappe import _
+from frappe.utils import add_to_date, get_datetime, now, now_datetime
+
+IDEMPOTENCY_DOCTYPE = "Mobile Idempotency Key"
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+
+KEY_TTL_HOURS = 24
+
+
+def idempotent(fn):
+    """Replay the stored response when a creation call is retried with the same key.
+
+    The key comes from the `Idempotency-Key` header or an `idempotency_key`
+    request argument and is scoped to the endpoint and user. Calls without a key run as
+    before. Error responses are not stored, so a failed call can be retried.
+    """
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        key = get_request_key()
+        if not key:
+            return frappe.call(fn, *args, **kwargs)
+
+        return run_idempotent(fn.__name__, key, lambda: frappe.call(fn, *args, **kwargs))
+
+    return wrapper
+
+
+def get_request_key():
+    # Read from the request itself: frappe.call drops arguments the endpoint does not declare
+    if not frappe.request:
+        return None
+
+    return frappe.get_request_header(IDEMPOTENCY_HEADER) or frappe.form_dict.get("idempotency_key")
+
+
+def make_key_name(endpoint, key):
+    return hashlib.md5(f"{endpoint}|{frappe.session.user}|{key}".encode("utf-8")).hexdigest()
+
+
+def run_idempotent(endpoint, key, call):
+    name = make_key_name(endpoint, key)
+
+    try:
+        # Insert first, with no locking read before it: a concurrent retry blocks on
+        # this row's key until the request commits or rolls back, then lands below
+        reserve_key(name, endpoint, key)
+    except (frappe.DuplicateEntryError, frappe.UniqueValidationError):
+        # Raised with a "duplicate entry" message the client should not see
+        frappe.clear_messages()
+
+        stored = get_stored_key(name)
+        if stored:
+            return replay(stored)
+
+        # The key had expired and was dropped, take it over
+        reserve_key(name, endpoint, key)
+
+    response = call()
+
+    if is_success(response):
+        frappe.db.set_value(
+            IDEMPOTENCY_DOCTYPE,
+            name,
+            {"status": "Completed", "response": frappe.as_json(response)},
+            update_modified=False
+        )
+    else:
+        frappe.db.delete(IDEMPOTENCY_DOCTYPE, name)
+
+    return response
+
+
+def get_stored_key(name):
+    # Only read once the insert failed, so the other transaction has finished;
+    # the locking read sees its committed row past this transaction's snapshot
+    stored = frappe.db.get_value(
+        IDEMPOTENCY_DOCTYPE, name, ["status", "response", "expires_on"], as_dict=True, for_update=True
+    )
+
+    if stored and get_datetime(stored.expires_on) < now_datetime():
+        frappe.db.delete(IDEMPOTENCY_DOCTYPE, name)
+        return None
+
+    return stored
+
+
+def reserve_key(name, endpoint, key):
+    doc = frappe.new_doc(IDEMPOTENCY_DOCTYPE)
+    # Named here rather than by the doctype: with hash naming, frappe retries a
+    # duplicate name under a new one instead of raising
+    doc.name = name
+    doc.owner = frappe.session.user
+    doc.endpoint = endpoint
+    doc.idempotency_key = key
+    doc.status = "Pending"
+    doc.expires_on = add_to_date(now(), hours=KEY_TTL_HOURS)
+    doc.db_insert()
+
+
+def replay(stored):
+    if not stored or stored.status != "Completed":
+        return {"status": "error", "message": _("A request with this idempotency key is still being processed.")}
+
+    frappe.local.response["idempotent_replay"] = 1
+    return json.loads(stored.response)
+
+
+def is_success(response):
+    return isinstance(response, dict) and response.get("status") in ("success", 1)
+
+
+def purge_expired_keys():
+    """Daily scheduler job: drop keys past their expiry."""
+    frappe.db.delete(IDEMPOTENCY_DOCTYPE, {"expires_on": ["<", now()]})
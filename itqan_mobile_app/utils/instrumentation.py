@@ -0,0 +1,131 @@
+import functools
+import json
+import time
+
+import frappe
+import redis
+
+from itqan_mobile_app.utils.cache import CACHE_PREFIX
+from itqan_mobile_app.utils.profiling import record_queries
+from itqan_mobile_app.utils.slow_queries import SlowQueryRecorder, capture_slow_queries, get_threshold
+
+METRICS_KEY = f"{CACHE_PREFIX}|api_metrics"
+METRICS_ENDPOINTS_KEY = f"{CACHE_PREFIX}|api_metrics_endpoints"
+
+# Rolling window of the latest calls kept per endpoint
+SAMPLE_SIZE = 1000
+
+METRICS = ("wall_ms", "queries", "query_ms", "rows", "response_bytes")
+PERCENTILES = (50, 95, 99)
+
+
+def instrumented(fn, endpoint=None):
+    """Record latency, query count and time, rows read and response size of every call.
+
+    Samples go to a capped Redis list per endpoint. Set `mobile_api_instrumentation`
+    to 0 in site_config.json to turn recording off. Slow queries are captured
+    too when the site enables it, see utils.slow_queries.
+    """
+    endpoint = endpoint or fn.__name__
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        enabled = frappe.conf.get("mobile_api_instrumentation", 1)
+        threshold = get_threshold()
+        if not enabled and not threshold:
+            return frappe.call(fn, *args, **kwargs)
+
+        # Calls inside a batch are recorded on their own, without a response of their own
+        nested = getattr(frappe.local, "mobile_api_depth", 0) > 0
+        frappe.local.mobile_api_depth = getattr(frappe.local, "mobile_api_depth", 0) + 1
+
+        start = time.monotonic()
+        try:
+            with record_queries(SlowQueryRecorder(threshold) if threshold else None) as recorder:
+                response = frappe.call(fn, *args, **kwargs)
+        finally:
+            frappe.local.mobile_api_depth -= 1
+
+        wall_ms = round((time.monotonic() - start) * 1000, 2)
+
+        if threshold and recorder.slow_queries:
+            capture_slow_queries(endpoint, recorder.slow_queries)
+
+        if not enabled:
+            return response
+
+        sample = [
+            wall_ms,
+            recorder.count,
+            round(recorder.duration * 1000, 2),
+            recorder.rows,
+            None
+        ]
+
+        if nested or not frappe.request:
+            add_sample(endpoint, sample)
+        else:
+            # The response size is known once frappe has serialized it, see `record_response_size`
+            frappe.local.mobile_api_sample = (endpoint, sample)
+
+        return response
+
+    return wrapper
+
+
+def record_response_size(response=None, request=None):
+    pending = getattr(frappe.local, "mobile_api_sample", None)
+    if not pending:
+        return
+
+    frappe.local.mobile_api_sample = None
+    endpoint, sample = pending
+
+    if response is not None:
+        sample[-1] = len(response.get_data())
+
+    add_sample(endpoint, sample)
+
+
+def add_sample(endpoint, sample):
+    key = frappe.cache().make_key(f"{METRICS_KEY}|{endpoint}")
+
+    pipe = frappe.cache().pipeline(transaction=False)
+    pipe.lpush(key, json.dumps(sample))
+    pipe.ltrim(key, 0, SAMPLE_SIZE - 1)
+    pipe.sadd(frappe.cache().make_key(METRICS_ENDPOINTS_KEY), endpoint)
+    pipe.execute()
+
+
+def get_metrics(endpoint=None):
+    """p50, p95 and p99 of each metric over the latest `SAMPLE_SIZE` calls per endpoint."""
+    if endpoint:
+        endpoints = [endpoint]
+    else:
+        endpoints = sorted(
+            frappe.safe_decode(e)
+            for e in redis.Redis.smembers(frappe.cache(), frappe.cache().make_key(METRICS_ENDPOINTS_KEY))
+        )
+
+    metrics = {}
+    for name in endpoints:
+        key = frappe.cache().make_key(f"{METRICS_KEY}|{name}")
+        samples = [json.loads(s) for s in redis.Redis.lrange(frappe.cache(), key, 0, -1)]
+        if not samples:
+            continue
+
+        metrics[name] = {"samples": len(samples)}
+        for i, metric in enumerate(METRICS):
+            values = sorted(s[i] for s in samples if s[i] is not None)
+            metrics[name][metric] = {f"p{p}": get_percentile(values, p) for p in PERCENTILES}
+
+    return metrics
+
+
+def get_percentile(values, percentile):
+    if not values:
+        return None
+
+    # Nearest rank
+    rank = max(int(-(-percentile * len(values) // 100)), 1)
+    return values[rank - 1]
@@ -0,0 +1,318 @@
+import json
+
+import frappe
+from frappe import _
+
+from itqan_mobile_app.utils.cache import get_cached
+from itqan_mobile_app.utils.loaders import get_all_with_children, get_child_rows
+from itqan_mobile_app.utils.prices import check_price_list_access, get_default_price_list, get_price_list_rates
+
+MAX_BULK_INVOICES = 500
+BULK_CHUNK_SIZE = 50
+
+# The database aborts the whole transaction on these, savepoints included
+TRANSACTION_ABORTED_ERRORS = (frappe.QueryDeadlockError, frappe.QueryTimeoutError)
+
+TAX_TEMPLATE_FIELDS = [
+    "charge_type", "account_head", "description", "cost_center",
+    "rate", "tax_amount", "included_in_print_rate", "row_id"
+]
+
+
+def get_invoice_context(invoices):
+    """Prices and tax details referenced by `invoices`, fetched once for all of them.
+
+    Takes a fixed number of queries however many invoices, lines and repeated
+    templates there are.
+    """
+    item_codes, item_tax_templates, tax_templates = get_invoice_references(invoices)
+
+    return frappe._dict({
+        "rates": get_rates_by_price_list(item_codes),
+        "item_tax_details": get_item_tax_details(list(item_tax_templates)),
+        "tax_templates": get_tax_template_rows(tax_templates)
+    })
+
+
+def get_cached_invoice_context(invoices):
+    """Same as `get_invoice_context`, with the tax templates read from the site cache."""
+    item_codes, item_tax_templates, tax_templates = get_invoice_references(invoices)
+
+    context = frappe._dict({
+        "rates": get_rates_by_price_list(item_codes),
+        "item_tax_details": {},
+        "tax_templates": {},
+        "conversion_factors": get_conversion_factors(invoices)
+    })
+
+    for template in item_tax_templates:
+        context.item_tax_details[template] = get_cached(
+            "item_tax_templates", template, lambda: get_item_tax_details([template]).get(template, [])
+        )
+
+    for name in tax_templates:
+        rows = get_cached("tax_templates", name, lambda: get_tax_template_rows([name]).get(name))
+        if rows is not None:
+            context.tax_templates[name] = rows
+
+    return context
+
+
+def get_invoice_references(invoices):
+    """Item codes to price per price list, and the tax templates `invoices` use."""
+    item_codes, item_tax_templates, tax_templates = {}, set(), set()
+
+    for data in invoices:
+        if data.get("taxes_and_charges"):
+            tax_templates.add(data["taxes_and_charges"])
+
+        for item in data.get("items") or []:
+            if not item.get("rate") and item.get("item_code"):
+                item_codes.setdefault(get_invoice_price_list(data), set()).add(item["item_code"])
+            if item.get("item_tax_template"):
+                item_tax_templates.add(item["item_tax_template"])
+
+    return item_codes, item_tax_templates, tax_templates
+
+
+def get_conversion_factors(invoices):
+    """UOM conversion factor per (item code, uom) for lines sent with a uom but no factor."""
+    item_codes = {
+        item["item_code"]
+        for data in invoices
+        for item in data.get("items") or []
+        if item.get("item_code") and item.get("uom") and not item.get("conversion_factor")
+    }
+
+    return {
+        (item_code, row.uom): row.conversion_factor
+        for item_code, rows in get_child_rows("Item", "uoms", ["uom", "conversion_factor"], list(item_codes)).items()
+        for row in rows
+    }
+
+
+def get_invoice_price_list(data):
+    return data.get("selling_price_list") or get_default_price_list()
+
+
+def get_rates_by_price_list(item_codes):
+    return {
+        price_list: get_price_list_rates(list(codes), price_list)
+        for price_list, codes in item_codes.items()
+    }
+
+
+def get_item_tax_details(templates):
+    return get_child_rows("Item Tax Template", "taxes", ["tax_type", "tax_rate"], templates)
+
+
+def get_tax_template_rows(names):
+    if not names:
+        return {}
+
+    templates = get_all_with_children(
+        "Sales Taxes and Charges Template",
+        fields=["name"],
+        children={"taxes": TAX_TEMPLATE_FIELDS},
+        filters={"name": ["in", list(names)]}
+    )
+
+    return {template.name: template.taxes for template in templates}
+
+
+def build_sales_invoice(data, context, defer_totals=False):
+    """Unsaved Sales Invoice for a mobile payload, priced and taxed from `context`.
+
+    Totals are calculated unless `defer_totals` is set, for callers that adjust
+    the document first.
+    """
+    customer = data.get("customer")
+    items = data.get("items", [])
+    if not customer or not items:
+        frappe.throw(_("Customer and items are required."))
+
+    posting_date = data.get("posting_date")
+    rates = context.rates.get(get_invoice_price_list(data), {})
+
+    item_rows = []
+    tax_map = {}
+
+    for item in items:
+        row = {
+            "item_code": item["item_code"],
+            "qty": item.get("qty", 1),
+            "rate": item.get("rate") or rates.get(item["item_code"])
+        }
+
+        for fieldname in ("uom", "conversion_factor"):
+            if item.get(fieldname):
+                row[fieldname] = item[fieldname]
+
+        if item.get("item_tax_template"):
+            row["item_tax_template"] = item["item_tax_template"]
+
+            for td in context.item_tax_details.get(item["item_tax_template"], []):
+                tax_map.setdefault(td.tax_type, {})[item["item_code"]] = [td.tax_rate, td.tax_rate]
+        else:
+            row["item_tax_template"] = ""
+            row["item_tax_rate"] = frappe.as_json({})
+
+        item_rows.append(row)
+
+    invoice = frappe.get_doc({
+        "doctype": "Sales Invoice",
+        "customer": customer,
+        "posting_date": posting_date,
+        "posting_time": data.get("posting_time"),
+        "set_posting_time": data.get("set_posting_time", 0),
+        "due_date": data.get("due_date") or posting_date,
+        "cost_center": data.get("cost_center"),
+        "project": data.get("project"),
+        "items": item_rows,
+        "update_stock": data.get("update_stock", 0),
+        "additional_discount_percentage": data.get("additional_discount_percentage", 0),
+        "discount_amount": data.get("discount_amount", 0),
+        "apply_discount_on": data.get("apply_discount_on"),
+        "taxes_and_charges": data.get("taxes_and_charges"),
+        "set_warehouse": data.get("warehouse"),
+        "selling_price_list": data.get("selling_price_list"),
+    })
+
+    for account_head, details in tax_map.items():
+        invoice.append("taxes", {
+            "charge_type": "On Net Total",
+            "account_head": account_head,
+            "rate": 0,
+            "item_wise_tax_detail": frappe.as_json(details),
+            "cost_center": data.get("cost_center"),
+            "description": f"Tax for {account_head}",
+        })
+
+    if data.get("taxes_and_charges"):
+        if data["taxes_and_charges"] not in context.tax_templates:
+            frappe.throw(
+                _("Sales Taxes and Charges Template {0} not found").format(data["taxes_and_charges"]),
+                frappe.DoesNotExistError
+            )
+
+        for tax in context.tax_templates[data["taxes_and_charges"]]:
+            invoice.append("taxes", dict(tax))
+
+    if not defer_totals:
+        invoice.run_method("calculate_taxes_and_totals")
+
+    return invoice
+
+
+def sync_sales_invoices(invoices):
+    """Insert a batch of offline invoices, returning one result per invoice, in order.
+
+    Invoices are committed in chunks of `BULK_CHUNK_SIZE`; a failing invoice is
+    rolled back to its savepoint and reported without affecting the others. A
+    deadlock or lock wait timeout loses the uncommitted chunk, so the sync stops
+    there and reports that chunk and the invoices after it as failed.
+    """
+    if isinstance(invoices, str):
+        invoices = json.loads(invoices)
+
+    if len(invoices) > MAX_BULK_INVOICES:
+        frappe.throw(_("A sync can hold at most {0} invoices").format(MAX_BULK_INVOICES))
+
+    context = get_invoice_context(invoices)
+
+    results = []
+    for start in range(0, len(invoices), BULK_CHUNK_SIZE):
+        try:
+            for index in range(start, min(start + BULK_CHUNK_SIZE, len(invoices))):
+                results.append(insert_sales_invoice(index, invoices[index], context))
+        except TRANSACTION_ABORTED_ERRORS as e:
+            frappe.db.rollback()
+            frappe.clear_messages()
+            frappe.log_error(frappe.get_traceback(), "Sync Sales Invoices API")
+
+            del results[start:]
+            results.extend(
+                {"index": index, "status": "error", "message": _("Not synced, retry: {0}").format(str(e))}
+                for index in range(start, len(invoices))
+            )
+            break
+
+        frappe.db.commit()
+
+    return results
+
+
+def insert_sales_invoice(index, data, context):
+    savepoint = f"mobile_invoice_{index}"
+    frappe.db.savepoint(savepoint)
+
+    try:
+        invoice = build_sales_invoice(data, context)
+        invoice.insert(ignore_permissions=True)
+    except TRANSACTION_ABORTED_ERRORS:
+        raise
+    except Exception as e:
+        frappe.db.rollback(save_point=savepoint)
+        frappe.clear_messages()
+        frappe.log_error(frappe.get_traceback(), "Sync Sales Invoices API")
+        return {"index": index, "status": "error", "message": str(e)}
+
+    return {"index": index, "status": "success", "invoice_name": invoice.name}
+
+
+def preview_sales_invoice(data):
+    """Totals of a cart as the invoice would compute them, without saving anything."""
+    frappe.has_permission("Sales Invoice", "create", throw=True)
+    check_price_list_access(data.get("selling_price_list"))
+
+    context = get_cached_invoice_context([data])
+    invoice = build_sales_invoice(data, context, defer_totals=True)
+
+    invoice.company = data.get("company") or get_cached(
+        "company_defaults",
+        "default_company",
+        lambda: frappe.db.get_single_value("Global Defaults", "default_company")
+    )
+    invoice.currency = frappe.get_cached_value("Company", invoice.company, "default_currency")
+    invoice.conversion_rate = 1
+    invoice.plc_conversion_rate = 1
+
+    for row in invoice.items:
+        # Set on insert from the template; the preview takes it from the prefetched rows
+        if row.item_tax_template:
+            row.item_tax_rate = frappe.as_json({
+                td.tax_type: td.tax_rate for td in context.item_tax_details.get(row.item_tax_template, [])
+            })
+        # Set on insert from the item's UOMs; without a uom the line is in the stock UOM
+        row.conversion_factor = row.conversion_factor or context.conversion_factors.get((row.item_code, row.uom)) or 1
+
+    invoice.run_method("calculate_taxes_and_totals")
+
+    return {
+        "currency": invoice.currency,
+        "items": [{
+            "item_code": row.item_code,
+            "qty": row.qty,
+            "uom": row.uom,
+            "conversion_factor": row.conversion_factor,
+            "rate": row.rate,
+            "amount": row.amount,
+            "net_amount": row.net_amount,
+            "item_tax_template": row.item_tax_template
+        } for row in invoice.items],
+        "taxes": [{
+            "account_head": tax.account_head,
+            "description": tax.description,
+            "rate": tax.rate,
+            "tax_amount": tax.tax_amount,
+            "total": tax.total
+        } for tax in invoice.taxes],
+        "total": invoice.total,
+        "additional_discount_percentage": invoice.additional_discount_percentage,
+        "discount_amount": invoice.discount_amount,
+        "net_total": invoice.net_total,
+        "total_taxes_and_charges": invoice.total_taxes_and_charges,
+        "grand_total": invoice.grand_total,
+        "rounding_adjustment": invoice.rounding_adjustment,
+        "rounded_total": invoice.rounded_total
+    }
@@ -0,0 +1,312 @@
+import json
+
+import frappe
+from frappe import _
+
+from itqan_mobile_app.utils.cache import get_cached
+from itqan_mobile_app.utils.etag import conditional_response, get_doctype_version
+from itqan_mobile_app.utils.instrumentation import instrumented
+from itqan_mobile_app.utils.pagination import get_page, normalize_filters
+
+# Columns every table has an index on
+ALWAYS_INDEXED = ("name", "creation", "modified")
+
+# Operators an index can seek on; `like` only with a fixed prefix
+SARGABLE_OPERATORS = ("=", "in", ">", "<", ">=", "<=", "between")
+
+# Cached lists are cleared when a document of their doctype changes, see utils.cache
+MASTER_CACHE_TTL = 6 * 60 * 60
+
+# Per doctype:
+#   fields: columns a client may request, default_fields: columns returned by default
+#   filters: columns a client may filter on, indexed: the ones among them with an index
+#   full_scan_ok: small tables where filtering on any declared column is fine
+#   cache_ttl: seconds a page is cached for, 0 to always read the database
+#   etag: answer 304 Not Modified when the client's If-None-Match still matches
+LIST_SPECS = {
+    "Item": {
+        "fields": ["name", "item_name", "item_group", "stock_uom", "disabled"],
+        "default_fields": ["name"],
+        "filters": ["item_group", "item_name", "variant_of", "disabled", "is_sales_item", "is_stock_item", "brand"],
+        "indexed": ["item_group", "item_name", "variant_of"]
+    },
+    "Customer": {
+        "fields": ["name", "customer_name", "customer_group", "territory", "mobile_no", "disabled"],
+        "default_fields": ["name", "customer_name"],
+        "filters": ["customer_name", "customer_group", "territory", "mobile_no", "disabled"],
+        "indexed": ["customer_name"]
+    },
+    "Supplier": {
+        "fields": ["name", "supplier_name", "supplier_group", "disabled"],
+        "default_fields": ["name", "supplier_name"],
+        "filters": ["supplier_name", "supplier_group", "disabled"],
+        "indexed": ["supplier_name"]
+    },
+    "Address": {
+        "fields": ["name", "address_title", "address_type", "address_line1", "city", "country"],
+        "default_fields": ["name"],
+        "filters": ["address_title", "address_type", "city", "country"],
+        "indexed": []
+    },
+    "Contact": {
+        "fields": ["name", "first_name", "last_name", "email_id", "mobile_no"],
+        "default_fields": ["name"],
+        "filters": ["first_name", "last_name", "email_id", "mobile_no"],
+        "indexed": ["email_id"]
+    },
+    "Payment Entry": {
+        "fields": ["name", "posting_date", "party_type", "party", "party_name", "payment_type", "mode_of_payment",
+            "paid_amount", "status", "docstatus"],
+        "default_fields": ["name", "posting_date", "party_name", "payment_type", "status"],
+        "filters": ["posting_date", "party_type", "party", "payment_type", "mode_of_payment", "status",
+            "docstatus", "company"],
+        "indexed": ["posting_date", "party"]
+    },
+    "Sales Invoice": {
+        "fields": ["name", "customer", "customer_name", "posting_date", "grand_total", "outstanding_amount",
+            "status", "docstatus"],
+        "default_fields": ["name"],
+        "filters": ["customer", "posting_date", "status", "docstatus", "company", "is_return", "is_pos"],
+        "indexed": ["customer", "posting_date"]
+    },
+    "Purchase Invoice": {
+        "fields": ["name", "supplier", "supplier_name", "posting_date", "grand_total", "outstanding_amount",
+            "status", "docstatus"],
+        "default_fields": ["name"],
+        "filters": ["supplier", "posting_date", "status", "docstatus", "company", "is_return"],
+        "indexed": ["supplier", "posting_date"]
+    },
+    "Bank Account": {
+        "fields": ["name", "account_name", "account", "bank", "company", "is_company_account"],
+        "default_fields": ["name"],
+        "filters": ["account", "bank", "company", "is_company_account", "party_type", "party", "disabled"],
+        "full_scan_ok": True,
+        "cache_ttl": MASTER_CACHE_TTL,
+        "etag": True
+    },
+    "Account": {
+        "fields": ["name", "account_name", "account_type", "root_type", "company", "is_group"],
+        "default_fields": ["name"],
+        "filters": ["account_type", "root_type", "company", "is_group", "parent_account", "disabled"],
+        "full_scan_ok": True,
+        "cache_ttl": MASTER_CACHE_TTL,
+        "etag": True
+    },
+    "Employee": {
+        "fields": ["name", "employee_name", "company", "status"],
+        "default_fields": ["name"],
+        "filters": ["employee_name", "company", "department", "status", "user_id"],
+        "full_scan_ok": True
+    },
+    "Shareholder": {
+        "fields": ["name", "title", "company"],
+        "default_fields": ["name"],
+        "filters": ["title", "company"],
+        "full_scan_ok": True,
+        "cache_ttl": MASTER_CACHE_TTL,
+        "etag": True
+    },
+    "Currency": {
+        "fields": ["name", "currency_name", "symbol", "enabled"],
+        "default_fields": ["name"],
+        "filters": ["enabled"],
+        "full_scan_ok": True,
+        "cache_ttl": MASTER_CACHE_TTL,
+        "etag": True
+    },
+    "Price List": {
+        "fields": ["name", "currency", "selling", "buying", "enabled"],
+        "default_fields": ["name"],
+        "filters": ["currency", "selling", "buying", "enabled"],
+        "full_scan_ok": True,
+        "cache_ttl": MASTER_CACHE_TTL,
+        "etag": True
+    },
+    "UOM": {
+        "fields": ["name", "uom_name", "must_be_whole_number", "enabled"],
+        "default_fields": ["name"],
+        "filters": ["must_be_whole_number", "enabled"],
+        "full_scan_ok": True,
+        "cache_ttl": MASTER_CACHE_TTL,
+        "etag": True
+    },
+    "Sales Person": {
+        "fields": ["name", "sales_person_name", "employee", "enabled"],
+        "default_fields": ["name"],
+        "filters": ["employee", "enabled", "is_group", "parent_sales_person"],
+        "full_scan_ok": True,
+        "cache_ttl": MASTER_CACHE_TTL,
+        "etag": True
+    },
+    "Sales Taxes and Charges Template": {
+        "fields": ["name", "title", "company", "is_default", "disabled"],
+        "default_fields": ["name"],
+        "filters": ["company", "is_default", "disabled"],
+        "full_scan_ok": True,
+        "cache_ttl": MASTER_CACHE_TTL,
+        "etag": True
+    },
+    "Purchase Taxes and Charges Template": {
+        "fields": ["name", "title", "company", "is_default", "disabled"],
+        "default_fields": ["name"],
+        "filters": ["company", "is_default", "disabled"],
+        "full_scan_ok": True,
+        "cache_ttl": MASTER_CACHE_TTL,
+        "etag": True
+    },
+    "Payment Terms Template": {
+        "fields": ["name", "template_name"],
+        "default_fields": ["name"],
+        "filters": ["template_name"],
+        "full_scan_ok": True,
+        "cache_ttl": MASTER_CACHE_TTL,
+        "etag": True
+    },
+    "Payment Term": {
+        "fields": ["name", "payment_term_name", "due_date_based_on", "credit_days"],
+        "default_fields": ["name"],
+        "filters": ["due_date_based_on"],
+        "full_scan_ok": True,
+        "cache_ttl": MASTER_CACHE_TTL,
+        "etag": True
+    },
+    "Terms and Conditions": {
+        "fields": ["name", "title", "selling", "buying", "disabled"],
+        "default_fields": ["name"],
+        "filters": ["selling", "buying", "disabled"],
+        "full_scan_ok": True,
+        "cache_ttl": MASTER_CACHE_TTL,
+        "etag": True
+    },
+    "Cost Center": {
+        "fields": ["name", "cost_center_name", "company", "is_group", "disabled"],
+        "default_fields": ["name"],
+        "filters": ["company", "is_group", "parent_cost_center", "disabled"],
+        "full_scan_ok": True,
+        "cache_ttl": MASTER_CACHE_TTL,
+        "etag": True
+    },
+    "Project": {
+        "fields": ["name", "project_name", "status", "company"],
+        "default_fields": ["name"],
+        "filters": ["project_name", "status", "company", "customer"],
+        "full_scan_ok": True
+    },
+    "Warehouse": {
+        "fields": ["name", "warehouse_name", "company", "is_group", "disabled"],
+        "default_fields": ["name"],
+        "filters": ["company", "is_group", "parent_warehouse", "disabled"],
+        "full_scan_ok": True,
+        "check_permissions": False,
+        "cache_ttl": MASTER_CACHE_TTL,
+        "etag": True
+    }
+}
+
+
+def get_list_spec(doctype):
+    spec = LIST_SPECS.get(doctype)
+    if not spec:
+        frappe.throw(_("Listing {0} is not supported").format(doctype))
+
+    return spec
+
+
+def get_registered_list(doctype, filters=None, cursor=None, page_length=None, fields=None):
+    spec = get_list_spec(doctype)
+    fields = validate_fields(doctype, spec, fields)
+    filters = normalize_filters(filters)
+    validate_filters(doctype, spec, filters)
+
+    def build():
+        if spec.get("cache_ttl"):
+            rows, next_cursor = get_cached(
+                f"list:{doctype}",
+                (fields, filters, cursor, page_length),
+                lambda: get_spec_page(doctype, spec, fields, filters, cursor, page_length),
+                ttl=spec["cache_ttl"],
+                scope="permissions" if spec.get("check_permissions", True) else None
+            )
+        else:
+            rows, next_cursor = get_spec_page(doctype, spec, fields, filters, cursor, page_length)
+
+        frappe.response["next_cursor"] = next_cursor
+        return rows
+
+    if spec.get("etag"):
+        tag = get_doctype_version(doctype, filters, fields, cursor, page_length)
+        return conditional_response(tag, build)
+
+    return build()
+
+
+def get_spec_page(doctype, spec, fields, filters, cursor, page_length):
+    return get_page(
+        doctype,
+        fields,
+        filters,
+        cursor,
+        page_length,
+        order_field=spec.get("order_field", "creation"),
+        check_permissions=spec.get("check_permissions", True)
+    )
+
+
+def validate_fields(doctype, spec, fields):
+    if not fields:
+        return spec["default_fields"]
+
+    if isinstance(fields, str):
+        fields = json.loads(fields) if fields.startswith("[") else [fields]
+
+    not_allowed = [f for f in fields if f not in spec["fields"]]
+    if not_allowed:
+        frappe.throw(_("Fields {0} cannot be requested for {1}").format(", ".join(not_allowed), doctype))
+
+    return fields
+
+
+def validate_filters(doctype, spec, filters):
+    filters = [get_filter_parts(f) for f in filters]
+    columns = [f[0] for f in filters]
+
+    not_allowed = [c for c in columns if c not in spec["filters"] and c not in ALWAYS_INDEXED]
+    if not_allowed:
+        frappe.throw(_("Cannot filter {0} on {1}").format(doctype, ", ".join(not_allowed)))
+
+    if spec.get("full_scan_ok") or not columns:
+        return
+
+    # A filter on a column without an index scans the table unless an indexed filter narrows it first
+    indexed = set(spec.get("indexed", [])) | set(ALWAYS_INDEXED)
+    if not any(column in indexed and is_sargable(operator, value) for column, operator, value in filters):
+        frappe.throw(_("Filtering {0} on {1} requires an =, in, range or prefix like filter on one of: {2}").format(
+            doctype, ", ".join(columns), ", ".join(sorted(indexed))))
+
+
+def get_filter_parts(f):
+    # [doctype, column, operator, value], [column, operator, value] or [column, value]
+    if len(f) == 4:
+        return f[1], f[2], f[3]
+    if len(f) == 3:
+        return f[0], f[1], f[2]
+    return f[0], "=", f[1]
+
+
+def is_sargable(operator, value):
+    operator = str(operator).strip().lower()
+    if operator == "like":
+        return isinstance(value, str) and bool(value) and value[0] not in ("%", "_")
+
+    return operator in SARGABLE_OPERATORS
+
+
+def make_list_endpoint(doctype):
+    """A whitelisted `get_X_list`-style function backed by the registry."""
+    get_list_spec(doctype)
+
+    def get_list(filters=None, cursor=None, page_length=None, fields=None):
+        return get_registered_list(doctype, filters, cursor, page_length, fields)
+
+    get_list.__doc__ = f"Paginated list of {doctype}"
+    return frappe.whitelist()(instrumented(get_list, f"list:{doctype}"))
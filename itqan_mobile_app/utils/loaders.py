@@ -0,0 +1,46 @@
+import frappe
+
+
+def get_all_with_children(doctype, fields, children, filters=None, order_by=None, check_permissions=False, **kwargs):
+    """List `doctype` rows with selected child table columns attached.
+
+    `children` maps a table fieldname to the child columns to load, e.g.
+    `{"taxes": ["charge_type", "rate"]}`. Runs one query for the parents and
+    one per child table, instead of a `frappe.get_doc` per parent.
+    """
+    get_rows = frappe.get_list if check_permissions else frappe.get_all
+
+    fields = list(fields)
+    if "name" not in fields:
+        fields.append("name")
+
+    parents = get_rows(doctype, filters=filters, fields=fields, order_by=order_by, **kwargs)
+    names = [parent.name for parent in parents]
+
+    for fieldname, child_fields in children.items():
+        rows = get_child_rows(doctype, fieldname, child_fields, names)
+
+        for parent in parents:
+            parent[fieldname] = rows.get(parent.name, [])
+
+    return parents
+
+
+def get_child_rows(doctype, fieldname, fields, parents):
+    """Child rows of table `fieldname` grouped by parent name, in `idx` order."""
+    if not parents:
+        return {}
+
+    child_doctype = frappe.get_meta(doctype).get_field(fieldname).options
+    rows = frappe.get_all(
+        child_doctype,
+        filters={"parent": ["in", parents], "parenttype": doctype, "parentfield": fieldname},
+        fields=["parent"] + [f for f in fields if f != "parent"],
+        order_by="idx asc"
+    )
+
+    grouped = {}
+    for row in rows:
+        grouped.setdefault(row.pop("parent"), []).append(row)
+
+    return grouped
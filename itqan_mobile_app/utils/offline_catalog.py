@@ -0,0 +1,357 @@
+import os
+import shutil
+import sqlite3
+
+import frappe
+from frappe.utils import add_days, get_datetime, now, scrub
+
+from itqan_mobile_app.utils.cache import CACHE_PREFIX
+from itqan_mobile_app.utils.catalog import (
+    build_items_details, get_first_tax_details, get_item_tax_templates
+)
+from itqan_mobile_app.utils.customers import get_primary_addresses
+from itqan_mobile_app.utils.loaders import get_all_with_children
+from itqan_mobile_app.utils.pagination import decode_cursor
+from itqan_mobile_app.utils.prices import get_price_list_rates
+from itqan_mobile_app.utils.sync import TOMBSTONE_RETENTION_DAYS, get_doctype_changes, get_settled_time
+
+CATALOG_STATE_KEY = f"{CACHE_PREFIX}|offline_catalog"
+CATALOG_CHANGED_KEY = f"{CACHE_PREFIX}|offline_catalog_changed"
+CATALOG_LOCK_KEY = f"{CACHE_PREFIX}|offline_catalog_lock"
+
+# Changes to these trigger an incremental refresh of the catalogs
+CATALOG_DOCTYPES = frozenset((
+    "Item", "Item Price", "Item Tax Template", "Customer", "Address", "Sales Taxes and Charges Template"
+))
+
+# Bump when what the catalog holds changes so existing files are rebuilt from scratch
+CATALOG_FORMAT = 3
+
+CHANGES_PAGE_LENGTH = 2000
+ITEMS_CHUNK = 1000
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+    CREATE TABLE IF NOT EXISTS items (
+        name TEXT PRIMARY KEY, item_name TEXT, item_group TEXT, image TEXT, stock_uom TEXT,
+        standard_rate REAL, item_tax_template TEXT, tax_account TEXT, tax_rate REAL
+    );
+    CREATE TABLE IF NOT EXISTS barcodes (barcode TEXT PRIMARY KEY, item_code TEXT NOT NULL);
+    CREATE INDEX IF NOT EXISTS barcodes_item_code ON barcodes (item_code);
+    CREATE TABLE IF NOT EXISTS item_prices (
+        name TEXT PRIMARY KEY, item_code TEXT, price_list TEXT, uom TEXT, price_list_rate REAL, selling INTEGER
+    );
+    CREATE INDEX IF NOT EXISTS item_prices_item_code ON item_prices (item_code, price_list);
+    CREATE TABLE IF NOT EXISTS customers (
+        name TEXT PRIMARY KEY, customer_name TEXT, mobile_no TEXT,
+        address_line1 TEXT, city TEXT, country TEXT, address TEXT
+    );
+    CREATE INDEX IF NOT EXISTS customers_mobile_no ON customers (mobile_no);
+    CREATE INDEX IF NOT EXISTS customers_address ON customers (address);
+    CREATE TABLE IF NOT EXISTS tax_templates (name TEXT PRIMARY KEY, title TEXT);
+    CREATE TABLE IF NOT EXISTS tax_template_rows (
+        template TEXT, idx INTEGER, charge_type TEXT, account_head TEXT, description TEXT, rate REAL
+    );
+"""
+
+
+def get_catalog_state(company):
+    state = frappe.cache().hget(CATALOG_STATE_KEY, company)
+
+    # A catalog of an older format is never served, the next request rebuilds it
+    if state and state.get("format") == CATALOG_FORMAT:
+        return state
+
+
+def get_catalog_file_name(company):
+    return f"itqan_catalog_{scrub(company)}.sqlite"
+
+
+def get_catalog_path(company):
+    return frappe.get_site_path("private", "files", get_catalog_file_name(company))
+
+
+def get_lock_key(company):
+    return frappe.cache().make_key(f"{CATALOG_LOCK_KEY}|{company}")
+
+
+def request_catalog_build(company):
+    # One build at a time per company; a build picks up everything changed before it starts
+    if frappe.cache().set(get_lock_key(company), 1, nx=True, ex=60 * 60):
+        frappe.enqueue(
+            "itqan_mobile_app.utils.offline_catalog.build_offline_catalog",
+            queue="long",
+            company=company
+        )
+
+
+def build_offline_catalog(company):
+    """Bring the company's SQLite catalog up to date, creating it on the first run.
+
+    Changes are applied to a copy that replaces the served file atomically, so a
+    download in progress never sees a half written database.
+    """
+    frappe.set_user("Administrator")
+
+    # Everything changed before this is read below, the sync leaves out only the settle margin
+    synced_to = str(get_settled_time())
+
+    try:
+        path = get_catalog_path(company)
+        tmp_path = f"{path}.tmp"
+
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+        # Past the tombstone retention deletions can no longer be replayed, start over
+        state = get_catalog_state(company)
+        if os.path.exists(path) and state and \
+                get_datetime(state["built_on"]) > get_datetime(add_days(now(), -TOMBSTONE_RETENTION_DAYS)):
+            shutil.copyfile(path, tmp_path)
+
+        conn = sqlite3.connect(tmp_path)
+        try:
+            conn.executescript(SCHEMA)
+            meta = dict(conn.execute("SELECT key, value FROM meta"))
+
+            sync_items(conn, meta)
+            sync_item_prices(conn, meta)
+            sync_item_tax_templates(conn, meta)
+            sync_customers(conn, meta)
+            sync_addresses(conn, meta)
+            sync_tax_templates(conn, company)
+
+            meta["built_on"] = now()
+            meta["version"] = frappe.generate_hash(length=12)
+            conn.executemany("INSERT OR REPLACE INTO meta VALUES (?, ?)", meta.items())
+            conn.commit()
+            conn.execute("VACUUM")
+        finally:
+            conn.close()
+
+        os.replace(tmp_path, path)
+        file_url = ensure_catalog_file(company)
+
+        frappe.cache().hset(CATALOG_STATE_KEY, company, {
+            "file_url": file_url,
+            "version": meta["version"],
+            "built_on": meta["built_on"],
+            "size": os.path.getsize(path),
+            "format": CATALOG_FORMAT,
+            "synced_to": synced_to
+        })
+    finally:
+        frappe.cache().delete(get_lock_key(company))
+
+
+def iterate_changes(doctype, meta):
+    """Pages of (updated rows, deleted names) since the cursor stored in `meta`."""
+    key = f"cursor:{doctype}"
+    cursor = meta.get(key)
+
+    while True:
+        changes = get_doctype_changes(doctype, decode_cursor(cursor), CHANGES_PAGE_LENGTH)
+        cursor = changes["cursor"]
+        yield changes["updated"], changes["deleted"]
+
+        if not changes["has_more"]:
+            break
+
+    meta[key] = cursor
+
+
+def sync_items(conn, meta):
+    for rows, deleted in iterate_changes("Item", meta):
+        delete_rows(conn, "items", "name", deleted)
+        delete_rows(conn, "barcodes", "item_code", deleted)
+
+        delete_rows(conn, "items", "name", [row.name for row in rows if row.disabled])
+        delete_rows(conn, "barcodes", "item_code", [row.name for row in rows])
+
+        items = build_items_details([row for row in rows if not row.disabled])
+
+        conn.executemany("""
+            INSERT OR REPLACE INTO items VALUES
+                (:name, :item_name, :item_group, :image, :stock_uom,
+                :standard_rate, :item_tax_template, :tax_account, :tax_rate)
+        """, items)
+        conn.executemany("INSERT OR REPLACE INTO barcodes VALUES (?, ?)", [
+            (barcode, item["name"]) for item in items for barcode in item["barcodes"]
+        ])
+
+
+def sync_item_prices(conn, meta):
+    for rows, deleted in iterate_changes("Item Price", meta):
+        # The file is downloadable by any sales user: buying costs and customer
+        # specific prices stay out, the same rows the price index leaves out
+        shared = [row for row in rows if row.selling and not row.customer]
+        removed = deleted + [row.name for row in rows if not (row.selling and not row.customer)]
+
+        affected = {row[0] for row in select_in(conn, "item_prices", "item_code", "name", removed)}
+        delete_rows(conn, "item_prices", "name", removed)
+
+        conn.executemany("""
+            INSERT OR REPLACE INTO item_prices VALUES
+                (:name, :item_code, :price_list, :uom, :price_list_rate, :selling)
+        """, shared)
+
+        affected.update(row.item_code for row in shared)
+        rates = get_price_list_rates(list(affected))
+        conn.executemany("UPDATE items SET standard_rate = ? WHERE name = ?", [
+            (rates.get(item_code, 0), item_code) for item_code in affected
+        ])
+
+
+def sync_item_tax_templates(conn, meta):
+    # Template rows do not touch the items using them, so refresh every item's tax columns
+    last_modified = frappe.db.get_value("Item Tax Template", {}, "max(modified)")
+    if not last_modified or str(last_modified) == meta.get("item_tax_template_modified"):
+        return
+
+    item_codes = [row[0] for row in conn.execute("SELECT name FROM items")]
+    for start in range(0, len(item_codes), ITEMS_CHUNK):
+        chunk = item_codes[start:start + ITEMS_CHUNK]
+        templates = get_item_tax_templates(chunk)
+        details = get_first_tax_details(set(templates.values()))
+
+        conn.executemany("""
+            UPDATE items SET item_tax_template = ?, tax_account = ?, tax_rate = ? WHERE name = ?
+        """, [
+            (
+                templates.get(item_code),
+                (details.get(templates.get(item_code)) or {}).get("tax_type"),
+                (details.get(templates.get(item_code)) or {}).get("tax_rate", 0),
+                item_code
+            ) for item_code in chunk
+        ])
+
+    meta["item_tax_template_modified"] = str(last_modified)
+
+
+def sync_customers(conn, meta):
+    for rows, deleted in iterate_changes("Customer", meta):
+        delete_rows(conn, "customers", "name", deleted + [row.name for row in rows if row.disabled])
+        upsert_customers(conn, [row for row in rows if not row.disabled])
+
+
+def sync_addresses(conn, meta):
+    # Address edits do not touch the customer, so follow them to the customers
+    # linked now and to those the catalog shows the address on
+    fresh = "cursor:Address" not in meta
+
+    for rows, deleted in iterate_changes("Address", meta):
+        # A new catalog already read every customer's current address
+        if fresh:
+            continue
+
+        names = [row.name for row in rows] + deleted
+        customers = {row[0] for row in select_in(conn, "customers", "name", "address", names)}
+        customers.update(get_linked_customers([row.name for row in rows]))
+
+        customers = list(customers)
+        for start in range(0, len(customers), ITEMS_CHUNK):
+            chunk = customers[start:start + ITEMS_CHUNK]
+            current = frappe.get_all(
+                "Customer",
+                filters={"name": ["in", chunk], "disabled": 0},
+                fields=["name", "customer_name", "mobile_no"]
+            )
+
+            delete_rows(conn, "customers", "name", set(chunk) - {row.name for row in current})
+            upsert_customers(conn, current)
+
+
+def get_linked_customers(addresses):
+    if not addresses:
+        return []
+
+    return frappe.get_all(
+        "Dynamic Link",
+        filters={"parenttype": "Address", "parent": ["in", addresses], "link_doctype": "Customer"},
+        pluck="link_name",
+        distinct=True
+    )
+
+
+def upsert_customers(conn, rows):
+    addresses = get_primary_addresses([row.name for row in rows])
+
+    conn.executemany("INSERT OR REPLACE INTO customers VALUES (?, ?, ?, ?, ?, ?, ?)", [
+        (
+            row.name, row.customer_name, row.mobile_no,
+            addresses.get(row.name, {}).get("address_line1"),
+            addresses.get(row.name, {}).get("city"),
+            addresses.get(row.name, {}).get("country"),
+            addresses.get(row.name, {}).get("address")
+        ) for row in rows
+    ])
+
+
+def sync_tax_templates(conn, company):
+    # A handful of rows per company, replaced on every run
+    templates = get_all_with_children(
+        "Sales Taxes and Charges Template",
+        fields=["name", "title"],
+        children={"taxes": ["idx", "charge_type", "account_head", "description", "rate"]},
+        filters={"company": company, "disabled": 0}
+    )
+
+    conn.execute("DELETE FROM tax_templates")
+    conn.execute("DELETE FROM tax_template_rows")
+    conn.executemany("INSERT INTO tax_templates VALUES (?, ?)", [(t.name, t.title) for t in templates])
+    conn.executemany("INSERT INTO tax_template_rows VALUES (?, ?, ?, ?, ?, ?)", [
+        (t.name, row.idx, row.charge_type, row.account_head, row.description, row.rate)
+        for t in templates for row in t.taxes
+    ])
+
+
+def delete_rows(conn, table, column, values):
+    conn.executemany(f"DELETE FROM {table} WHERE {column} = ?", [(value,) for value in values])
+
+
+def select_in(conn, table, select, column, values):
+    rows = []
+    for value in values:
+        rows.extend(conn.execute(f"SELECT {select} FROM {table} WHERE {column} = ?", (value,)))
+
+    return rows
+
+
+def ensure_catalog_file(company):
+    file_url = f"/private/files/{get_catalog_file_name(company)}"
+
+    if not frappe.db.exists("File", {"file_url": file_url}):
+        frappe.get_doc({
+            "doctype": "File",
+            "file_name": get_catalog_file_name(company),
+            "file_url": file_url,
+            "is_private": 1,
+            "attached_to_doctype": "Company",
+            "attached_to_name": company
+        }).insert(ignore_permissions=True)
+        frappe.db.commit()
+
+    return file_url
+
+
+def mark_catalogs_dirty(doc, method=None, *args, **kwargs):
+    if doc.doctype in CATALOG_DOCTYPES:
+        frappe.cache().set_value(CATALOG_CHANGED_KEY, now())
+
+
+def refresh_offline_catalogs():
+    """Scheduler entry point: refresh every built catalog not synced past the latest change.
+
+    Nothing is cleared here, so a company whose build is already running, or whose
+    last build still left the change inside the settle margin, is retried on the next run.
+    """
+    changed_on = frappe.cache().get_value(CATALOG_CHANGED_KEY)
+    if not changed_on:
+        return
+
+    for company in frappe.cache().hkeys(CATALOG_STATE_KEY) or []:
+        company = frappe.safe_decode(company)
+        state = frappe.cache().hget(CATALOG_STATE_KEY, company) or {}
+
+        if not state.get("synced_to") or get_datetime(state["synced_to"]) <= get_datetime(changed_on):
+            request_catalog_build(company)
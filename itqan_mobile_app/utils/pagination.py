@@ -0,0 +1,103 @@
+import base64
+import json
+
+import frappe
+from frappe import _
+from frappe.utils import cint
+
+DEFAULT_PAGE_LENGTH = 100
+MAX_PAGE_LENGTH = 500
+
+
+def get_page(doctype, fields, filters=None, cursor=None, page_length=None, order_field="creation",
+        check_permissions=True):
+    """One page of `doctype` in descending (`order_field`, name) order.
+
+    Pages are fetched by seeking past the last row of the previous page, so any
+    page costs the same as the first one. Returns the rows and the continuation
+    token for the next page, or None when there are no more rows.
+    """
+    page_length = get_page_length(page_length)
+    fields = [fields] if isinstance(fields, str) else list(fields)
+    extra_fields = [f for f in (order_field, "name") if f not in fields]
+
+    position = decode_cursor(cursor)
+    seek = get_seek_filters(order_field, position["value"], position["name"], descending=True) \
+        if position else {"filters": []}
+
+    get_rows = frappe.get_list if check_permissions else frappe.get_all
+    rows = get_rows(
+        doctype,
+        fields=fields + extra_fields,
+        filters=normalize_filters(filters) + seek["filters"],
+        or_filters=seek.get("or_filters"),
+        order_by=f"{order_field} desc, name desc",
+        limit_page_length=page_length + 1
+    )
+
+    next_cursor = None
+    if len(rows) > page_length:
+        rows = rows[:page_length]
+        next_cursor = encode_cursor({"value": str(rows[-1][order_field]), "name": rows[-1].name})
+
+    for row in rows:
+        for field in extra_fields:
+            row.pop(field, None)
+
+    return rows, next_cursor
+
+
+def get_list_page(doctype, fields, filters=None, cursor=None, page_length=None, **kwargs):
+    """`get_page` for endpoints returning a bare list; the token goes in `next_cursor` of the response."""
+    rows, next_cursor = get_page(doctype, fields, filters, cursor, page_length, **kwargs)
+    frappe.response["next_cursor"] = next_cursor
+
+    return rows
+
+
+def get_page_length(page_length):
+    return min(cint(page_length) or DEFAULT_PAGE_LENGTH, MAX_PAGE_LENGTH)
+
+
+def get_seek_filters(field, value, name, descending=False):
+    """Filters for rows strictly after (`value`, `name`) in (`field`, name) order."""
+    if value is None:
+        return {"filters": []}
+
+    inclusive, strict = ("<=", "<") if descending else (">=", ">")
+
+    return {
+        "filters": [[field, inclusive, value]],
+        "or_filters": [[field, strict, value], ["name", strict, name]]
+    }
+
+
+def normalize_filters(filters):
+    """Client filters (JSON, dict or list) as a list that seek filters can be appended to."""
+    if not filters:
+        return []
+
+    if isinstance(filters, str):
+        filters = json.loads(filters)
+
+    if isinstance(filters, dict):
+        return [
+            [field, value[0], value[1]] if isinstance(value, (list, tuple)) else [field, "=", value]
+            for field, value in filters.items()
+        ]
+
+    return list(filters)
+
+
+def encode_cursor(cursor):
+    return base64.urlsafe_b64encode(json.dumps(cursor).encode()).decode()
+
+
+def decode_cursor(token):
+    if not token:
+        return None
+
+    try:
+        return json.loads(base64.urlsafe_b64decode(token.encode()))
+    except Exception:
+        frappe.throw(_("Invalid cursor"))
@@ -0,0 +1,44 @@
+import frappe
+
+from itqan_mobile_app.utils.cache import get_cached
+
+
+def get_mode_of_payments(company, filters=None):
+    return get_cached(
+        "mode_of_payments",
+        filters,
+        lambda: build_mode_of_payments(company, filters),
+        company=company
+    )
+
+
+def build_mode_of_payments(company, filters=None):
+    modes = frappe.get_all("Mode of Payment", filters=filters, fields=["name", "type"])
+    accounts = get_mode_of_payment_accounts(company, [mode.name for mode in modes])
+
+    return [
+        {
+            "name": mode.name,
+            "type": mode.type,
+            "account": accounts.get(mode.name)
+        } for mode in modes
+    ]
+
+
+def get_mode_of_payment_accounts(company, modes):
+    if not modes:
+        return {}
+
+    rows = frappe.get_all(
+        "Mode of Payment Account",
+        filters={"parent": ["in", modes], "parenttype": "Mode of Payment", "company": company},
+        fields=["parent", "default_account"],
+        order_by="idx asc"
+    )
+
+    accounts = {}
+    for row in rows:
+        accounts.setdefault(row.parent, row.default_account)
+
+    return accounts
+
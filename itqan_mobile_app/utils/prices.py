@@ -0,0 +1,194 @@
+import functools
+
+import frappe
+import redis
+from frappe import _
+from frappe.utils import flt, now
+
+from itqan_mobile_app.utils.cache import CACHE_PREFIX, get_cached
+
+PRICE_INDEX_KEY = f"{CACHE_PREFIX}|price_index"
+
+# Set once a price list's index is complete, so an empty list is not rebuilt on every read
+BUILT_FIELD = "__built__"
+
+WRITE_CHUNK = 5000
+
+
+def get_default_price_list():
+    return get_cached(
+        "company_defaults",
+        "selling_price_list",
+        lambda: frappe.db.get_single_value("Selling Settings", "selling_price_list")
+    )
+
+
+def check_price_list_access(price_list=None):
+    """Throw unless the user may read item prices and `price_list`, when given, is a selling list."""
+    frappe.has_permission("Item Price", "read", throw=True)
+
+    # Buying lists hold purchase costs, they are never served to the app
+    if price_list and not frappe.get_cached_value("Price List", price_list, "selling"):
+        frappe.throw(_("{0} is not a selling price list").format(price_list), frappe.PermissionError)
+
+
+def get_price_list_rates(item_codes, price_list=None):
+    """Rate per item code in `price_list`, the default selling list when not given.
+
+    Each item resolves to its most recently modified price in the list, whatever the UOM.
+    """
+    price_list = price_list or get_default_price_list()
+    if not item_codes or not price_list:
+        return {}
+
+    values = lookup(price_list, [make_field(item_code) for item_code in item_codes])
+    return {item_code: flt(value) for item_code, value in zip(item_codes, values) if value is not None}
+
+
+def get_rates(items, price_list=None):
+    """Rates for `items`, item codes or `{"item_code", "uom"}` dicts, one entry per item in order.
+
+    A UOM only matches prices recorded in that UOM; without one, any UOM matches.
+    """
+    price_list = price_list or get_default_price_list()
+    items = [item if isinstance(item, dict) else {"item_code": item} for item in items]
+
+    values = [None] * len(items)
+    if price_list and items:
+        values = lookup(price_list, [make_field(item.get("item_code"), item.get("uom")) for item in items])
+
+    return [{
+        "item_code": item.get("item_code"),
+        "uom": item.get("uom"),
+        "rate": flt(value) if value is not None else None
+    } for item, value in zip(items, values)]
+
+
+def get_index_key(price_list):
+    return frappe.cache().make_key(f"{PRICE_INDEX_KEY}|{price_list}")
+
+
+def make_field(item_code, uom=None):
+    return f"{item_code}|{uom or ''}"
+
+
+def lookup(price_list, fields):
+    key = get_index_key(price_list)
+
+    # Rates are stored as plain numbers, read them without the wrapper's unpickling
+    if not redis.Redis.hexists(frappe.cache(), key, BUILT_FIELD):
+        build_price_index(price_list)
+
+    return [
+        frappe.safe_decode(value) if value is not None else None
+        for value in redis.Redis.hmget(frappe.cache(), key, fields)
+    ]
+
+
+def get_price_filters(price_list, **filters):
+    # Customer specific prices are negotiated per party and stay out of the shared index
+    return dict(filters, price_list=price_list, selling=1, customer=["is", "not set"])
+
+
+def build_price_index(price_list):
+    prices = frappe.get_all(
+        "Item Price",
+        filters=get_price_filters(price_list),
+        fields=["item_code", "uom", "price_list_rate"],
+        order_by="modified asc"
+    )
+
+    index = make_index(prices)
+    index[BUILT_FIELD] = now()
+
+    key = get_index_key(price_list)
+    fields = list(index.items())
+
+    # MULTI/EXEC, so readers see either the old index or the complete new one
+    pipe = frappe.cache().pipeline()
+    pipe.delete(key)
+    for start in range(0, len(fields), WRITE_CHUNK):
+        pipe.hset(key, mapping=dict(fields[start:start + WRITE_CHUNK]))
+    pipe.execute()
+
+
+def make_index(prices):
+    index = {}
+    for price in prices:
+        # Prices come oldest first, so the latest one ends up in each field
+        index[make_field(price.item_code, price.uom)] = price.price_list_rate
+        index[make_field(price.item_code)] = price.price_list_rate
+
+    return index
+
+
+def refresh_item_prices(price_list, item_code, uoms):
+    """Recompute one item's fields in a built index, dropping those with no price left."""
+    key = get_index_key(price_list)
+    if not redis.Redis.hexists(frappe.cache(), key, BUILT_FIELD):
+        # Built on first read, with this change included
+        return
+
+    index = make_index(frappe.get_all(
+        "Item Price",
+        filters=get_price_filters(price_list, item_code=item_code),
+        fields=["item_code", "uom", "price_list_rate"],
+        order_by="modified asc"
+    ))
+
+    stale = [make_field(item_code, uom) for uom in set(uoms) | {None}]
+    stale = [field for field in stale if field not in index]
+
+    pipe = frappe.cache().pipeline()
+    if stale:
+        pipe.hdel(key, *stale)
+    if index:
+        pipe.hset(key, mapping=index)
+    pipe.execute()
+
+
+def update_price_index(doc, method=None, *args, **kwargs):
+    """Item Price hook: refresh the prices it touched once the change is committed."""
+    touched = {(doc.price_list, doc.item_code): {doc.uom}}
+
+    before = doc.get_doc_before_save() if method == "on_update" else None
+    if before:
+        touched.setdefault((before.price_list, before.item_code), set()).add(before.uom)
+
+    for (price_list, item_code), uoms in touched.items():
+        frappe.db.after_commit.add(functools.partial(refresh_item_prices, price_list, item_code, uoms))
+
+
+def drop_price_index(doc, method=None, old=None, new=None, *args, **kwargs):
+    """Price List and Item hook: renames and deletes rewrite Item Prices without running their hooks.
+
+    Only the indexes and fields of the renamed or deleted document are dropped.
+    """
+    if doc.doctype == "Price List":
+        for price_list in {old or doc.name, new or doc.name}:
+            frappe.db.after_commit.add(functools.partial(frappe.cache().delete, get_index_key(price_list)))
+        return
+
+    frappe.db.after_commit.add(functools.partial(drop_item_prices, old or doc.name))
+    if new:
+        for price_list in get_selling_price_lists():
+            frappe.db.after_commit.add(functools.partial(refresh_item_prices, price_list, new, []))
+
+
+def drop_item_prices(item_code):
+    # The item's fields are "<item_code>|<uom>"; scan each hash rather than the keyspace
+    pattern = f"{escape_pattern(item_code)}|*"
+
+    for price_list in get_selling_price_lists():
+        key = get_index_key(price_list)
+        fields = [field for field, _value in redis.Redis.hscan_iter(frappe.cache(), key, match=pattern)]
+        if fields:
+            redis.Redis.hdel(frappe.cache(), key, *fields)
+
+
+def get_selling_price_lists():
+    return frappe.get_all("Price List", filters={"selling": 1}, pluck="name")
+
+
+def escape_pattern(value):
+    return "".join(f"\\{c}" if c in "*?[]\\" else c for c in value)
@@ -0,0 +1,83 @@
+import time
+from contextlib import contextmanager
+
+import frappe
+
+
+class QueryRecorder:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.rows = 0
+
+    def add(self, query, values, duration, result=None):
+        self.count += 1
+        self.duration += duration
+        if isinstance(result, (list, tuple)):
+            self.rows += len(result)
+
+
+@contextmanager
+def record_queries(recorder=None):
+    """Count every `frappe.db.sql` call made inside the block.
+
+    Recorders can be nested; each query is reported to all active recorders.
+    """
+    recorder = recorder or QueryRecorder()
+    recorders = _get_recorders()
+
+    if not recorders:
+        _patch_db()
+
+    recorders.append(recorder)
+    try:
+        yield recorder
+    finally:
+        recorders.remove(recorder)
+        if not recorders:
+            _unpatch_db()
+
+
+@contextmanager
+def paused_recording():
+    """Run the block's queries without reporting them to the active recorders."""
+    recorders = _get_recorders()
+    frappe.local.query_recorders = []
+    try:
+        yield
+    finally:
+        frappe.local.query_recorders = recorders
+
+
+def _get_recorders():
+    if not hasattr(frappe.local, "query_recorders"):
+        frappe.local.query_recorders = []
+
+    return frappe.local.query_recorders
+
+
+def _patch_db():
+    db = frappe.db
+    original_sql = db.sql
+
+    def sql(query, values=(), *args, **kwargs):
+        start = time.monotonic()
+        result = None
+        try:
+            result = original_sql(query, values, *args, **kwargs)
+            return result
+        finally:
+            duration = time.monotonic() - start
+            for recorder in list(_get_recorders()):
+                recorder.add(query, values, duration, result)
+
+    db.sql = sql
+    frappe.local.query_recorder_db = db
+
+
+def _unpatch_db():
+    db = getattr(frappe.local, "query_recorder_db", None)
+    if db is not None and "sql" in db.__dict__:
+        del db.sql
+
+    frappe.local.query_recorder_db = None
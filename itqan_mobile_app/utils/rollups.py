@@ -0,0 +1,389 @@
+import hashlib
+
+import frappe
+from frappe import _
+from frappe.utils import add_days, add_months, cint, date_diff, flt, get_first_day, getdate, month_diff, now, nowdate
+
+from itqan_mobile_app.utils.cache import get_cached
+
+SALES_ROLLUP_FIELDS = (
+    "sales_amount", "sales_count", "return_amount", "return_count", "payment_amount", "payment_count"
+)
+
+MAX_TIMESERIES_BUCKETS = 366
+
+BUCKET_EXPRESSIONS = {
+    "day": "posting_date",
+    "week": "DATE_SUB(posting_date, INTERVAL WEEKDAY(posting_date) DAY)",
+    "month": "DATE_FORMAT(posting_date, '%%Y-%%m-01')"
+}
+
+# Ranges that include today keep changing, older ones only move on backdated submits
+CURRENT_TIMESERIES_TTL = 60
+PAST_TIMESERIES_TTL = 60 * 60
+
+
+def make_rollup_name(*key):
+    # Must match the MD5(CONCAT_WS('|', ...)) used by the rebuild queries
+    return hashlib.md5("|".join(str(k or "") for k in key).encode("utf-8")).hexdigest()
+
+
+def on_sales_invoice_submit(doc, method=None):
+    update_sales_invoice_rollups(doc, 1)
+
+
+def on_sales_invoice_cancel(doc, method=None):
+    update_sales_invoice_rollups(doc, -1)
+
+
+def on_payment_entry_submit(doc, method=None):
+    update_payment_entry_rollups(doc, 1)
+
+
+def on_payment_entry_cancel(doc, method=None):
+    update_payment_entry_rollups(doc, -1)
+
+
+def update_sales_invoice_rollups(doc, sign):
+    posting_date = getdate(doc.posting_date)
+
+    values = {"sales_amount": sign * flt(doc.grand_total), "sales_count": sign}
+    if doc.is_return:
+        values.update({"return_amount": sign * flt(doc.grand_total), "return_count": sign})
+
+    add_to_sales_rollup(posting_date, doc.company, "", values)
+
+    items = {}
+    for row in doc.items:
+        item = items.setdefault(row.item_code or "", {"item_name": row.item_name, "qty": 0, "amount": 0})
+        item["qty"] += sign * flt(row.qty)
+        item["amount"] += sign * flt(row.amount)
+
+    for item_code, item in items.items():
+        add_to_item_sales_rollup(posting_date, doc.company, item_code, item)
+
+
+def update_payment_entry_rollups(doc, sign):
+    add_to_sales_rollup(getdate(doc.posting_date), doc.company, doc.mode_of_payment or "", {
+        "payment_amount": sign * flt(doc.paid_amount),
+        "payment_count": sign
+    })
+
+
+def add_to_sales_rollup(posting_date, company, mode_of_payment, values):
+    row = {field: values.get(field, 0) for field in SALES_ROLLUP_FIELDS}
+    timestamp = now()
+
+    frappe.db.sql("""
+        INSERT INTO `tabMobile Sales Rollup`
+            (name, creation, modified, owner, modified_by, docstatus,
+            posting_date, company, mode_of_payment,
+            sales_amount, sales_count, return_amount, return_count, payment_amount, payment_count)
+        VALUES
+            (%(name)s, %(timestamp)s, %(timestamp)s, 'Administrator', 'Administrator', 0,
+            %(posting_date)s, %(company)s, %(mode_of_payment)s,
+            %(sales_amount)s, %(sales_count)s, %(return_amount)s, %(return_count)s,
+            %(payment_amount)s, %(payment_count)s)
+        ON DUPLICATE KEY UPDATE
+            sales_amount = sales_amount + VALUES(sales_amount),
+            sales_count = sales_count + VALUES(sales_count),
+            return_amount = return_amount + VALUES(return_amount),
+            return_count = return_count + VALUES(return_count),
+            payment_amount = payment_amount + VALUES(payment_amount),
+            payment_count = payment_count + VALUES(payment_count),
+            modified = VALUES(modified)
+    """, dict(
+        row,
+        name=make_rollup_name(posting_date, company, mode_of_payment),
+        timestamp=timestamp,
+        posting_date=posting_date,
+        company=company,
+        mode_of_payment=mode_of_payment
+    ))
+
+
+def add_to_item_sales_rollup(posting_date, company, item_code, values):
+    timestamp = now()
+
+    frappe.db.sql("""
+        INSERT INTO `tabMobile Item Sales Rollup`
+            (name, creation, modified, owner, modified_by, docstatus,
+            posting_date, company, item_code, item_name, qty, amount)
+        VALUES
+            (%(name)s, %(timestamp)s, %(timestamp)s, 'Administrator', 'Administrator', 0,
+            %(posting_date)s, %(company)s, %(item_code)s, %(item_name)s, %(qty)s, %(amount)s)
+        ON DUPLICATE KEY UPDATE
+            item_name = VALUES(item_name),
+            qty = qty + VALUES(qty),
+            amount = amount + VALUES(amount),
+            modified = VALUES(modified)
+    """, {
+        "name": make_rollup_name(posting_date, company, item_code),
+        "timestamp": timestamp,
+        "posting_date": posting_date,
+        "company": company,
+        "item_code": item_code,
+        "item_name": values.get("item_name"),
+        "qty": values.get("qty", 0),
+        "amount": values.get("amount", 0)
+    })
+
+
+def rebuild_sales_rollups(from_date=None, to_date=None):
+    """Recompute the rollup tables from submitted documents, one month at a time."""
+    to_date = getdate(to_date or nowdate())
+    from_date = getdate(from_date or get_first_posting_date() or to_date)
+
+    month_start = get_first_day(from_date)
+    while month_start <= to_date:
+        start = max(month_start, from_date)
+        end = min(add_months(month_start, 1), add_days(to_date, 1))
+
+        rebuild_sales_rollups_for_range(start, end)
+        frappe.db.commit()
+
+        month_start = add_months(month_start, 1)
+
+
+def get_first_posting_date():
+    dates = frappe.db.sql("""
+        SELECT MIN(posting_date) FROM `tabSales Invoice` WHERE docstatus = 1
+        UNION ALL
+        SELECT MIN(posting_date) FROM `tabPayment Entry` WHERE docstatus = 1
+    """)
+
+    dates = [d[0] for d in dates if d[0]]
+    return min(dates) if dates else None
+
+
+def rebuild_sales_rollups_for_range(start, end):
+    # `end` is exclusive
+    values = {"start": start, "end": end}
+
+    frappe.db.sql("""
+        DELETE FROM `tabMobile Sales Rollup`
+        WHERE posting_date >= %(start)s AND posting_date < %(end)s
+    """, values)
+
+    frappe.db.sql("""
+        DELETE FROM `tabMobile Item Sales Rollup`
+        WHERE posting_date >= %(start)s AND posting_date < %(end)s
+    """, values)
+
+    frappe.db.sql("""
+        INSERT INTO `tabMobile Sales Rollup`
+            (name, creation, modified, owner, modified_by, docstatus,
+            posting_date, company, mode_of_payment,
+            sales_amount, sales_count, return_amount, return_count, payment_amount, payment_count)
+        SELECT
+            MD5(CONCAT_WS('|', posting_date, company, '')), NOW(6), NOW(6), 'Administrator', 'Administrator', 0,
+            posting_date, company, '',
+            SUM(grand_total), COUNT(name),
+            SUM(IF(is_return = 1, grand_total, 0)), SUM(IF(is_return = 1, 1, 0)),
+            0, 0
+        FROM `tabSales Invoice`
+        WHERE docstatus = 1 AND posting_date >= %(start)s AND posting_date < %(end)s
+        GROUP BY posting_date, company
+    """, values)
+
+    frappe.db.sql("""
+        INSERT INTO `tabMobile Sales Rollup`
+            (name, creation, modified, owner, modified_by, docstatus,
+            posting_date, company, mode_of_payment,
+            sales_amount, sales_count, return_amount, return_count, payment_amount, payment_count)
+        SELECT
+            MD5(CONCAT_WS('|', posting_date, company, IFNULL(mode_of_payment, ''))), NOW(6), NOW(6),
+            'Administrator', 'Administrator', 0,
+            posting_date, company, IFNULL(mode_of_payment, ''),
+            0, 0, 0, 0,
+            SUM(paid_amount), COUNT(name)
+        FROM `tabPayment Entry`
+        WHERE docstatus = 1 AND posting_date >= %(start)s AND posting_date < %(end)s
+        GROUP BY posting_date, company, IFNULL(mode_of_payment, '')
+        ON DUPLICATE KEY UPDATE
+            payment_amount = VALUES(payment_amount),
+            payment_count = VALUES(payment_count)
+    """, values)
+
+    frappe.db.sql("""
+        INSERT INTO `tabMobile Item Sales Rollup`
+            (name, creation, modified, owner, modified_by, docstatus,
+            posting_date, company, item_code, item_name, qty, amount)
+        SELECT
+            MD5(CONCAT_WS('|', si.posting_date, si.company, IFNULL(sii.item_code, ''))), NOW(6), NOW(6),
+            'Administrator', 'Administrator', 0,
+            si.posting_date, si.company, IFNULL(sii.item_code, ''), MAX(sii.item_name),
+            SUM(sii.qty), SUM(sii.amount)
+        FROM `tabSales Invoice Item` sii
+        JOIN `tabSales Invoice` si ON si.name = sii.parent
+        WHERE si.docstatus = 1 AND si.posting_date >= %(start)s AND si.posting_date < %(end)s
+        GROUP BY si.posting_date, si.company, IFNULL(sii.item_code, '')
+    """, values)
+
+
+def get_sales_statistics(company=None):
+    today = getdate(nowdate())
+    month_start = get_first_day(today)
+    year_start = today.replace(month=1, day=1)
+
+    values = {"today": today, "month_start": month_start, "year_start": year_start, "company": company}
+    company_condition = "AND company = %(company)s" if company else ""
+
+    stats = {}
+
+    default_currency = frappe.db.get_single_value("Global Defaults", "default_currency")
+    stats["currency"] = default_currency or ""
+
+    totals = frappe.db.sql(f"""
+        SELECT
+            SUM(IF(posting_date = %(today)s, sales_amount, 0)) as sales_today_amount,
+            SUM(IF(posting_date = %(today)s, sales_count, 0)) as sales_today_count,
+            SUM(IF(posting_date >= %(month_start)s, sales_amount, 0)) as sales_month_amount,
+            SUM(IF(posting_date >= %(month_start)s, sales_count, 0)) as sales_month_count,
+            SUM(sales_amount) as sales_year_amount,
+            SUM(sales_count) as sales_year_count,
+            SUM(IF(posting_date = %(today)s, return_amount, 0)) as returns_today_amount,
+            SUM(IF(posting_date = %(today)s, return_count, 0)) as returns_today_count
+        FROM `tabMobile Sales Rollup`
+        WHERE posting_date >= %(year_start)s AND posting_date <= %(today)s {company_condition}
+    """, values, as_dict=True)[0]
+
+    for key in ("sales_today", "sales_month", "sales_year", "returns_today"):
+        stats[key] = {
+            "total_amount": flt(totals.get(f"{key}_amount")),
+            "total_count": cint(totals.get(f"{key}_count"))
+        }
+
+    stats["payments_today"] = [
+        {
+            "mode_of_payment": row.mode_of_payment or None,
+            "total_amount": flt(row.total_amount),
+            "total_count": cint(row.total_count)
+        } for row in frappe.db.sql(f"""
+            SELECT
+                mode_of_payment,
+                SUM(payment_amount) as total_amount,
+                SUM(payment_count) as total_count
+            FROM `tabMobile Sales Rollup`
+            WHERE posting_date = %(today)s {company_condition}
+            GROUP BY mode_of_payment
+            HAVING total_count > 0
+        """, values, as_dict=True)
+    ]
+
+    # Invoice status depends on payments and due dates, not on the posting date,
+    # so it is read live; the overdue total is derived from the same rows.
+    stats["invoice_status"] = frappe.db.sql(f"""
+        SELECT
+            status,
+            COUNT(name) as total_count,
+            COALESCE(SUM(outstanding_amount), 0) as total_amount
+        FROM `tabSales Invoice`
+        WHERE docstatus = 1 AND status IN ('Overdue','Unpaid','Partly Paid') {company_condition}
+        GROUP BY status
+    """, values, as_dict=True)
+
+    stats["total_overdue"] = {
+        "total_amount": sum(flt(row.total_amount) for row in stats["invoice_status"])
+    }
+
+    stats["top_items_today"] = frappe.db.sql(f"""
+        SELECT
+            item_code,
+            MAX(item_name) as item_name,
+            SUM(qty) as total_qty,
+            SUM(amount) as total_income
+        FROM `tabMobile Item Sales Rollup`
+        WHERE posting_date = %(today)s {company_condition}
+        GROUP BY item_code
+        HAVING total_qty != 0 OR total_income != 0
+        ORDER BY total_income DESC
+        LIMIT 5
+    """, values, as_dict=True)
+
+    return stats
+
+
+def get_sales_timeseries(from_date, to_date, bucket="day", company=None):
+    from_date, to_date = getdate(from_date), getdate(to_date)
+
+    if bucket not in BUCKET_EXPRESSIONS:
+        frappe.throw(_("Bucket must be one of: {0}").format(", ".join(BUCKET_EXPRESSIONS)))
+
+    if from_date > to_date:
+        frappe.throw(_("From Date cannot be after To Date"))
+
+    start, count = get_bucket_range(from_date, to_date, bucket)
+    if count > MAX_TIMESERIES_BUCKETS:
+        frappe.throw(_("Date range spans {0} buckets, the maximum is {1}").format(
+            count, MAX_TIMESERIES_BUCKETS))
+
+    periods = [get_bucket_period(start, index, bucket) for index in range(count)]
+
+    ttl = CURRENT_TIMESERIES_TTL if to_date >= getdate(nowdate()) else PAST_TIMESERIES_TTL
+
+    return get_cached(
+        "sales_timeseries",
+        (from_date, to_date, bucket),
+        lambda: build_sales_timeseries(from_date, to_date, bucket, company, periods),
+        ttl=ttl,
+        company=company
+    )
+
+
+def build_sales_timeseries(from_date, to_date, bucket, company, periods):
+    company_condition = "AND company = %(company)s" if company else ""
+
+    rows = frappe.db.sql(f"""
+        SELECT
+            {BUCKET_EXPRESSIONS[bucket]} as period,
+            SUM(sales_amount) as sales_amount,
+            SUM(sales_count) as sales_count,
+            SUM(return_amount) as return_amount,
+            SUM(return_count) as return_count,
+            SUM(payment_amount) as payment_amount,
+            SUM(payment_count) as payment_count
+        FROM `tabMobile Sales Rollup`
+        WHERE posting_date >= %(from_date)s AND posting_date <= %(to_date)s {company_condition}
+        GROUP BY period
+    """, {"from_date": from_date, "to_date": to_date, "company": company}, as_dict=True)
+
+    totals = {getdate(row.period): row for row in rows}
+
+    buckets = []
+    for period in periods:
+        row = totals.get(period) or {}
+        buckets.append({
+            "period": period,
+            "sales_amount": flt(row.get("sales_amount")),
+            "sales_count": cint(row.get("sales_count")),
+            "return_amount": flt(row.get("return_amount")),
+            "return_count": cint(row.get("return_count")),
+            "payment_amount": flt(row.get("payment_amount")),
+            "payment_count": cint(row.get("payment_count"))
+        })
+
+    return buckets
+
+
+def get_bucket_range(from_date, to_date, bucket):
+    """First bucket start date and number of buckets covering the range."""
+    if bucket == "day":
+        return from_date, date_diff(to_date, from_date) + 1
+
+    if bucket == "week":
+        start = add_days(from_date, -from_date.weekday())
+        return start, date_diff(to_date, start) // 7 + 1
+
+    start = get_first_day(from_date)
+    return start, month_diff(to_date, start)
+
+
+def get_bucket_period(start, index, bucket):
+    if bucket == "day":
+        return getdate(add_days(start, index))
+
+    if bucket == "week":
+        return getdate(add_days(start, 7 * index))
+
+    return getdate(add_months(start, index))
@@ -0,0 +1,92 @@
+import hashlib
+import json
+import re
+
+import frappe
+import redis
+from frappe.utils import cint, flt, now
+
+from itqan_mobile_app.utils.cache import CACHE_PREFIX, make_cache_key
+from itqan_mobile_app.utils.profiling import QueryRecorder, paused_recording
+
+SLOW_QUERIES_KEY = f"{CACHE_PREFIX}|slow_queries"
+SLOW_QUERY_SEEN_KEY = f"{CACHE_PREFIX}|slow_query_seen"
+
+# Site config key, in milliseconds; capture is off while it is unset or 0
+THRESHOLD_CONF_KEY = "mobile_slow_query_threshold_ms"
+
+RING_SIZE = 200
+
+# The same query shape is captured at most once per window
+SAMPLE_WINDOW = 60
+
+MAX_VALUES_LENGTH = 2000
+
+
+class SlowQueryRecorder(QueryRecorder):
+    def __init__(self, threshold_ms):
+        super().__init__()
+        self.threshold = threshold_ms / 1000
+        self.slow_queries = []
+
+    def add(self, query, values, duration, result=None):
+        super().add(query, values, duration, result)
+        if duration >= self.threshold:
+            self.slow_queries.append((str(query), values, duration))
+
+
+def get_threshold():
+    return flt(frappe.conf.get(THRESHOLD_CONF_KEY))
+
+
+def normalize_query(query):
+    """Query shape with literals and IN lists folded, so repeats group together."""
+    query = re.sub(r"\s+", " ", query).strip()
+    query = re.sub(r"'(?:[^'\\]|\\.)*'", "?", query)
+    query = re.sub(r'"(?:[^"\\]|\\.)*"', "?", query)
+    query = re.sub(r"\b\d+(?:\.\d+)?\b", "?", query)
+    query = re.sub(r"%\(\w+\)s|%s", "?", query)
+    return re.sub(r"\(\s*\?(?:\s*,\s*\?)*\s*\)", "(?+)", query)
+
+
+def capture_slow_queries(endpoint, slow_queries):
+    """Add the slow queries of one call to the ring buffer, with their EXPLAIN plans."""
+    for query, values, duration in slow_queries:
+        normalized = normalize_query(query)
+        digest = hashlib.md5(normalized.encode("utf-8")).hexdigest()
+        fingerprint = frappe.cache().make_key(f"{SLOW_QUERY_SEEN_KEY}|{digest}")
+        if not frappe.cache().set(fingerprint, 1, nx=True, ex=SAMPLE_WINDOW):
+            continue
+
+        entry = {
+            "endpoint": endpoint,
+            "query": normalized,
+            "values": make_cache_key(values)[:MAX_VALUES_LENGTH],
+            "duration_ms": round(duration * 1000, 2),
+            "explain": explain(query, values),
+            "user": frappe.session.user,
+            "captured_on": now()
+        }
+
+        key = frappe.cache().make_key(SLOW_QUERIES_KEY)
+        pipe = frappe.cache().pipeline(transaction=False)
+        pipe.lpush(key, json.dumps(entry, default=str))
+        pipe.ltrim(key, 0, RING_SIZE - 1)
+        pipe.execute()
+
+
+def explain(query, values):
+    if not query.lstrip().lower().startswith("select"):
+        return None
+
+    try:
+        # The plan is the capture's own overhead, keep it out of the call's counts
+        with paused_recording():
+            return frappe.db.sql(f"EXPLAIN {query}", values, as_dict=True)
+    except Exception as e:
+        return str(e)
+
+
+def get_slow_queries(limit=50):
+    key = frappe.cache().make_key(SLOW_QUERIES_KEY)
+    return [json.loads(entry) for entry in redis.Redis.lrange(frappe.cache(), key, 0, cint(limit) - 1)]
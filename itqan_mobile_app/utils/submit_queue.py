@@ -0,0 +1,163 @@
+import functools
+
+import frappe
+from frappe import _
+from frappe.utils import add_to_date, now, now_datetime
+
+from itqan_mobile_app.utils.cache import CACHE_PREFIX
+
+SUBMIT_JOB_DOCTYPE = "Mobile Submit Job"
+SUBMIT_LOCK_KEY = f"{CACHE_PREFIX}|submit_lock"
+
+SUBMIT_DOCTYPES = frozenset(("Sales Invoice", "Payment Entry", "Material Request"))
+
+JOB_RETENTION_HOURS = 24
+DRAIN_LOCK_TTL = 60 * 60
+
+
+def enqueue_submit(doctype, name):
+    """Queue `doctype` `name` for submission, returning the job id to poll.
+
+    Submits are queued per company and drained in order by a single background
+    job per company, so end of day bursts post their stock and GL entries one
+    after another instead of holding web workers. Jobs are rows of Mobile Submit
+    Job, so clearing the cache does not lose them.
+    """
+    if doctype not in SUBMIT_DOCTYPES:
+        frappe.throw(_("{0} cannot be submitted in the background").format(doctype))
+
+    frappe.has_permission(doctype, "submit", name, throw=True)
+
+    company = frappe.db.get_value(doctype, name, "company")
+
+    job = frappe.get_doc({
+        "doctype": SUBMIT_JOB_DOCTYPE,
+        "ref_doctype": doctype,
+        "ref_name": name,
+        "company": company,
+        "user": frappe.session.user,
+        "status": "Queued"
+    }).insert(ignore_permissions=True)
+
+    # The drain reads the job from the database, start it once the job is committed
+    frappe.db.after_commit.add(functools.partial(request_drain, company))
+
+    return job.name
+
+
+def get_lock_key(company):
+    return frappe.cache().make_key(f"{SUBMIT_LOCK_KEY}|{company}")
+
+
+def get_job_status(job_id):
+    job = frappe.db.get_value(
+        SUBMIT_JOB_DOCTYPE,
+        job_id,
+        ["ref_doctype", "ref_name", "user", "status", "creation", "started_on", "finished_on", "message"],
+        as_dict=True
+    )
+    if not job or (job.user != frappe.session.user and "System Manager" not in frappe.get_roles()):
+        frappe.throw(_("Submit job {0} not found").format(job_id), frappe.DoesNotExistError)
+
+    return {
+        "status": job.status.lower(),
+        "doctype": job.ref_doctype,
+        "name": job.ref_name,
+        "user": job.user,
+        "queued_on": job.creation,
+        "started_on": job.started_on,
+        "finished_on": job.finished_on,
+        "message": job.message
+    }
+
+
+def request_drain(company):
+    if frappe.cache().set(get_lock_key(company), 1, nx=True, ex=DRAIN_LOCK_TTL):
+        frappe.enqueue(
+            "itqan_mobile_app.utils.submit_queue.drain_submit_queue",
+            queue="long",
+            company=company
+        )
+
+
+def drain_submit_queue(company):
+    """Background job: submit everything queued for `company`, one job at a time."""
+    try:
+        while True:
+            job_id = claim_next_job(company)
+            if not job_id:
+                break
+
+            run_submit_job(job_id)
+    finally:
+        frappe.cache().delete(get_lock_key(company))
+
+    # A submit queued while the lock was being released would otherwise wait for the next one
+    if get_next_job(company):
+        request_drain(company)
+
+
+def get_next_job(company, for_update=False):
+    return frappe.db.get_value(
+        SUBMIT_JOB_DOCTYPE,
+        {"company": company, "status": "Queued"},
+        "name",
+        order_by="creation asc",
+        for_update=for_update
+    )
+
+
+def claim_next_job(company):
+    # Committed as running before the submit, so a second drainer cannot take it too
+    job_id = get_next_job(company, for_update=True)
+    if job_id:
+        frappe.db.set_value(SUBMIT_JOB_DOCTYPE, job_id, {"status": "Running", "started_on": now()})
+
+    frappe.db.commit()
+    return job_id
+
+
+def run_submit_job(job_id):
+    job = frappe.db.get_value(SUBMIT_JOB_DOCTYPE, job_id, ["ref_doctype", "ref_name", "user"], as_dict=True)
+    frappe.set_user(job.user)
+
+    try:
+        doc = frappe.get_doc(job.ref_doctype, job.ref_name)
+        if doc.docstatus == 0:
+            doc.submit()
+        frappe.db.commit()
+    except Exception as e:
+        frappe.db.rollback()
+        frappe.clear_messages()
+        frappe.log_error(frappe.get_traceback(), "Mobile Submit Job Error")
+        result = {"status": "Failed", "message": str(e)}
+    else:
+        result = {"status": "Submitted" if doc.docstatus == 1 else "Skipped"}
+
+    result["finished_on"] = now()
+    frappe.db.set_value(SUBMIT_JOB_DOCTYPE, job_id, result)
+    frappe.db.commit()
+
+
+def resume_submit_jobs():
+    """Scheduler job: requeue jobs a dead worker left running and drain every company with queued jobs.
+
+    Submitting again is safe, `run_submit_job` skips documents that are already submitted.
+    """
+    frappe.db.set_value(
+        SUBMIT_JOB_DOCTYPE,
+        {"status": "Running", "started_on": ["<", add_to_date(now_datetime(), seconds=-DRAIN_LOCK_TTL)]},
+        {"status": "Queued", "started_on": None}
+    )
+    frappe.db.commit()
+
+    for company in frappe.get_all(SUBMIT_JOB_DOCTYPE, filters={"status": "Queued"}, pluck="company", distinct=True):
+        request_drain(company)
+
+
+def purge_submit_jobs():
+    """Daily scheduler job: drop finished jobs past their retention."""
+    frappe.db.delete(SUBMIT_JOB_DOCTYPE, {
+        "status": ["in", ["Submitted", "Skipped", "Failed"]],
+        "modified": ["<", add_to_date(now_datetime(), hours=-JOB_RETENTION_HOURS)]
+    })
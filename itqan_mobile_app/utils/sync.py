@@ -0,0 +1,149 @@
+import frappe
+from frappe import _
+from frappe.utils import add_days, add_to_date, cint, get_datetime, now, now_datetime
+
+from itqan_mobile_app.utils.pagination import decode_cursor, encode_cursor, get_seek_filters
+
+# Doctypes the app keeps an offline copy of, with the columns it needs
+SYNC_DOCTYPES = {
+    "Item": ["name", "item_name", "item_group", "stock_uom", "image", "disabled"],
+    "Item Price": ["name", "item_code", "price_list", "uom", "price_list_rate", "selling", "customer"],
+    "Customer": ["name", "customer_name", "mobile_no", "disabled"],
+    "Address": ["name", "address_title", "address_type", "address_line1", "city", "country", "disabled"],
+    "UOM": ["name"],
+    "Warehouse": ["name", "company", "is_group", "disabled"],
+    "Price List": ["name", "currency", "selling", "buying", "enabled"],
+    "Currency": ["name", "enabled"],
+    "Mode of Payment": ["name", "type", "enabled"],
+    "Sales Taxes and Charges Template": ["name", "title", "company"],
+    "Cost Center": ["name", "company", "is_group"]
+}
+
+DEFAULT_SYNC_PAGE_LENGTH = 500
+MAX_SYNC_PAGE_LENGTH = 2000
+
+TOMBSTONE_RETENTION_DAYS = 90
+
+# Rows and tombstones younger than this may still be in uncommitted transactions;
+# they are left for a later page so a cursor never moves past them
+SYNC_SETTLE_SECONDS = 300
+
+
+def get_changes(cursors=None, doctypes=None, page_length=None):
+    """Rows changed and names deleted per doctype since each doctype's cursor.
+
+    Clients should apply `deleted` before `updated`, so a document deleted and
+    recreated under the same name inside one window survives.
+    """
+    cursors = cursors or {}
+    doctypes = doctypes or list(cursors) or list(SYNC_DOCTYPES)
+    page_length = min(cint(page_length) or DEFAULT_SYNC_PAGE_LENGTH, MAX_SYNC_PAGE_LENGTH)
+
+    changes = {}
+    for doctype in doctypes:
+        if doctype not in SYNC_DOCTYPES:
+            frappe.throw(_("{0} cannot be synced").format(doctype))
+
+        if not frappe.has_permission(doctype, "read"):
+            continue
+
+        changes[doctype] = get_doctype_changes(doctype, decode_cursor(cursors.get(doctype)), page_length)
+
+    return changes
+
+
+def get_doctype_changes(doctype, cursor, page_length):
+    if cursor and get_datetime(cursor["deleted"]["creation"]) < get_tombstone_cutoff():
+        # Deletions older than the retention window are gone, the client must start over
+        cursor = None
+        reset = True
+    else:
+        reset = False
+
+    if not cursor:
+        cursor = {"modified": None, "name": None, "deleted": {"creation": str(get_settled_time()), "name": ""}}
+
+    settled = get_settled_time()
+
+    seek = get_seek_filters("modified", cursor["modified"], cursor["name"])
+    seek["filters"].append(["modified", "<", settled])
+
+    fields = SYNC_DOCTYPES[doctype]
+    rows = frappe.get_list(
+        doctype,
+        fields=fields + ["modified"],
+        order_by="modified asc, name asc",
+        limit_page_length=page_length + 1,
+        **seek
+    )
+
+    has_more = len(rows) > page_length
+    rows = rows[:page_length]
+
+    if rows:
+        cursor["modified"], cursor["name"] = str(rows[-1].modified), rows[-1].name
+
+    deleted = []
+    if not reset:
+        deleted_cursor = cursor["deleted"]
+        seek = get_seek_filters("creation", deleted_cursor["creation"], deleted_cursor["name"])
+        seek["filters"].extend([["ref_doctype", "=", doctype], ["creation", "<", settled]])
+
+        tombstones = frappe.get_all(
+            "Mobile Sync Tombstone",
+            fields=["name", "ref_name", "creation"],
+            order_by="creation asc, name asc",
+            limit_page_length=page_length + 1,
+            **seek
+        )
+
+        more_tombstones = len(tombstones) > page_length
+        has_more = has_more or more_tombstones
+        tombstones = tombstones[:page_length]
+
+        if tombstones:
+            cursor["deleted"] = {"creation": str(tombstones[-1].creation), "name": tombstones[-1].name}
+
+        # Move past quiet periods too, or a client with no deletions to read falls out of retention
+        if not more_tombstones and get_datetime(cursor["deleted"]["creation"]) < settled:
+            cursor["deleted"] = {"creation": str(settled), "name": ""}
+
+        deleted = [t.ref_name for t in tombstones]
+
+    return {
+        "updated": rows,
+        "deleted": deleted,
+        "cursor": encode_cursor(cursor),
+        "has_more": has_more,
+        "reset": reset
+    }
+
+
+def get_settled_time():
+    return add_to_date(now_datetime(), seconds=-SYNC_SETTLE_SECONDS)
+
+
+def get_tombstone_cutoff():
+    return get_datetime(add_days(now(), -TOMBSTONE_RETENTION_DAYS))
+
+
+def record_tombstone(doc, method=None):
+    if doc.doctype in SYNC_DOCTYPES:
+        add_tombstone(doc.doctype, doc.name)
+
+
+def record_rename_tombstone(doc, method=None, old=None, new=None, merge=False):
+    if doc.doctype in SYNC_DOCTYPES and old:
+        add_tombstone(doc.doctype, old)
+
+
+def add_tombstone(doctype, name):
+    frappe.get_doc({
+        "doctype": "Mobile Sync Tombstone",
+        "ref_doctype": doctype,
+        "ref_name": name
+    }).insert(ignore_permissions=True)
+
+
+def purge_tombstones():
+    frappe.db.delete("Mobile Sync Tombstone", {"creation": ["<", get_tombstone_cutoff()]})
@@ -4,11 +4,34 @@ import os
 from collections.abc import Iterable
 from six import string_types
 import frappe
-from frappe.utils import flt
+from frappe.utils import cint, flt
 from frappe import _
 from frappe.utils import get_files_path
 from frappe.utils.file_manager import save_file
-from frappe.utils import nowdate, nowtime, get_first_day, getdate
+from frappe.utils import nowdate, nowtime
+from itqan_mobile_app.utils.batch import run_batch
+from itqan_mobile_app.utils.bootstrap import get_bootstrap_snapshot
+from itqan_mobile_app.utils.cache import get_cached, get_stats as get_cache_statistics
+from itqan_mobile_app.utils.catalog import get_items_details, lookup_item
+from itqan_mobile_app.utils.customers import get_customers_with_address
+from itqan_mobile_app.utils.etag import conditional_response, get_doctype_version, make_version_tag
+from itqan_mobile_app.utils.idempotency import idempotent
+from itqan_mobile_app.utils.instrumentation import get_metrics as get_instrumentation_metrics
+from itqan_mobile_app.utils.instrumentation import instrumented
+from itqan_mobile_app.utils.invoicing import build_sales_invoice, get_invoice_context, sync_sales_invoices
+from itqan_mobile_app.utils.invoicing import preview_sales_invoice as get_invoice_preview
+from itqan_mobile_app.utils.list_registry import get_registered_list, make_list_endpoint
+from itqan_mobile_app.utils.loaders import get_all_with_children
+from itqan_mobile_app.utils.offline_catalog import get_catalog_state, request_catalog_build
+from itqan_mobile_app.utils.pagination import get_list_page, get_page
+from itqan_mobile_app.utils.payments import get_mode_of_payments
+from itqan_mobile_app.utils.prices import check_price_list_access
+from itqan_mobile_app.utils.prices import get_rates as get_price_index_rates
+from itqan_mobile_app.utils.rollups import get_sales_statistics as get_rollup_sales_statistics
+from itqan_mobile_app.utils.rollups import get_sales_timeseries
+from itqan_mobile_app.utils.slow_queries import get_slow_queries as get_captured_slow_queries
+from itqan_mobile_app.utils.submit_queue import enqueue_submit, get_job_status
+from itqan_mobile_app.utils.sync import get_changes
 
 def log_error(title, error):
     frappe.log_error(frappe.get_traceback(), title)
@@ -22,11 +45,13 @@ def flatten(lis):
             yield item
 
 @frappe.whitelist(allow_guest=True)
+@instrumented
 def get_user(user):
     doc = frappe.get_doc("User", user)
     return {"user": doc, "type": "user"}
 
 @frappe.whitelist()
+@instrumented
 def get_user_profile(user=None):
     if not user:
         user = frappe.session.user
@@ -45,6 +70,7 @@ def get_user_profile(user=None):
     }
 
 @frappe.whitelist()
+@instrumented
 def update_user_profile():
     try:
         user = frappe.session.user
@@ -98,11 +124,11 @@ def update_user_profile():
         frappe.log_error(frappe.get_traceback(), "Update User Profile Error")
         return {"status": "error", "message": str(e)}
 
-@frappe.whitelist()
-def get_items_list(filters=None):
-    return frappe.db.get_list("Item", filters=filters, fields="name")
+get_items_list = make_list_endpoint("Item")
 
 @frappe.whitelist()
+@instrumented
+@idempotent
 def create_payment(args):
     if isinstance(args, string_types):
         args = json.loads(args)
@@ -144,6 +170,7 @@ def create_payment(args):
         return {"status": 0, "error": str(e)}
 
 @frappe.whitelist()
+@instrumented
 def update_payment(args):
     if isinstance(args, string_types):
         args = json.loads(args)
@@ -173,15 +200,15 @@ def update_payment(args):
 
     return {"error": 0, "status": 1}
 
-@frappe.whitelist()
-def get_payment_entries_list(filters=None):
-    return frappe.db.get_list("Payment Entry", filters=filters, fields=["name", "posting_date", "party_name", "payment_type", "status"])
+get_payment_entries_list = make_list_endpoint("Payment Entry")
 
 @frappe.whitelist()
+@instrumented
 def get_payment_entry(payment_entry):
     return frappe.get_all("Payment Entry", filters={"name": payment_entry}, fields=["*"])
 
 @frappe.whitelist()
+@instrumented
 def create_sales_invoice(args):
     if isinstance(args, string_types):
         args = json.loads(args)
@@ -219,6 +246,7 @@ def create_sales_invoice(args):
     return {"error": 0, "status": 1}
 
 @frappe.whitelist()
+@instrumented
 def update_sales_invoice(args):
     if isinstance(args, string_types):
         args = json.loads(args)
@@ -249,20 +277,29 @@ def update_sales_invoice(args):
     return {"error": 0, "status": 1}
 
 @frappe.whitelist()
+@instrumented
 def get_default_company():
-    return {
-        "company": frappe.db.get_single_value("Global Defaults", "default_company")
-    }
+    company = get_cached(
+        "company_defaults",
+        "default_company",
+        lambda: frappe.db.get_single_value("Global Defaults", "default_company")
+    )
 
-@frappe.whitelist()
-def get_sales_invoices_list(filters=None):
-    return frappe.db.get_list("Sales Invoice", filters=filters, fields="name")
+    return conditional_response(
+        make_version_tag("Global Defaults", "default_company", company),
+        lambda: {"company": company}
+    )
+
+get_sales_invoices_list = make_list_endpoint("Sales Invoice")
 
 @frappe.whitelist()
+@instrumented
 def get_sales_invoice(sales_invoice):
     return frappe.get_all("Sales Invoice", filters={"name": sales_invoice}, fields=["*"])
 
 @frappe.whitelist()
+@instrumented
+@idempotent
 def create_purchase_invoice(args):
     if isinstance(args, string_types):
         args = json.loads(args)
@@ -300,6 +337,7 @@ def create_purchase_invoice(args):
     return {"error": 0, "status": 1}
 
 @frappe.whitelist()
+@instrumented
 def update_purchase_invoice(args):
     if isinstance(args, string_types):
         args = json.loads(args)
@@ -329,27 +367,29 @@ def update_purchase_invoice(args):
 
     return {"error": 0, "status": 1}
 
-@frappe.whitelist()
-def get_purchase_invoices_list(filters=None):
-    return frappe.db.get_list("Purchase Invoice", filters=filters, fields="name")
+get_purchase_invoices_list = make_list_endpoint("Purchase Invoice")
 
 @frappe.whitelist()
+@instrumented
 def get_purchase_invoice(purchase_invoice):
     return frappe.get_all("Purchase Invoice", filters={"name": purchase_invoice}, fields=["*"])
 
 @frappe.whitelist()
+@instrumented
 def get_exchange_rate(from_currency, to_currency, transaction_date = None):
     from erpnext.setup.utils import get_exchange_rate
 
     return get_exchange_rate(from_currency, to_currency, transaction_date)
 
 @frappe.whitelist()
+@instrumented
 def get_payment_party_details(party_type, party, date, company=None, cost_center=None):
     from erpnext.accounts.doctype.payment_entry.payment_entry import get_party_details
 
     return get_party_details(company, party_type, party, date, cost_center)
 
 @frappe.whitelist()
+@instrumented
 def get_paid_to_accounts_query(payment_type, party_type, company=None):
     if not company:
         from erpnext import get_default_company
@@ -364,13 +404,14 @@ def get_paid_to_accounts_query(payment_type, party_type, company=None):
             account_types =  ["Receivable"]
         else: account_types = ["Payable"]
 
-    return frappe.db.get_all("Account", {
+    return get_cached("accounts", account_types, lambda: frappe.db.get_all("Account", {
         "company": company,
         "is_group": 0,
         "account_type": ("in", account_types)
-    }, "name", as_list = 1)  
+    }, "name", as_list = 1), company=company)
 
 @frappe.whitelist()
+@instrumented
 def get_paid_from_accounts_query(payment_type, party_type, company=None):
     if not company:
         from erpnext import get_default_company
@@ -385,168 +426,106 @@ def get_paid_from_accounts_query(payment_type, party_type, company=None):
             account_types =  ["Receivable"]
         else: account_types = ["Payable"]
 
-    return frappe.db.get_all("Account", {
+    return get_cached("accounts", account_types, lambda: frappe.db.get_all("Account", {
         "company": company,
         "is_group": 0,
         "account_type": ("in", account_types)
-    }, "name", as_list = 1)  
+    }, "name", as_list = 1), company=company)
 
 @frappe.whitelist()
+@instrumented
 def get_outstanding_documents(args):
     from erpnext.accounts.doctype.payment_entry.payment_entry import get_outstanding_reference_documents
 
     return get_outstanding_reference_documents(args)
 
 @frappe.whitelist()
+@instrumented
 def get_conversion_factor(item_code, uom):
     from erpnext.stock.get_item_details import get_conversion_factor
 
     return get_conversion_factor(item_code, uom)
 
 @frappe.whitelist()
+@instrumented
 def get_item_details(args):
     from erpnext.stock.get_item_details import get_item_details
 
     return get_item_details(args)
 
 @frappe.whitelist()
+@instrumented
 def get_party_details(party_type, party, posting_date=None, company=None, account=None, price_list=None, pos_profile=None, doctype=None):
     from erpnext.accounts.party import get_party_details
 
     return get_party_details(party_type=party_type, party=party, posting_date=posting_date, company=company, account=account, price_list=price_list, pos_profile=pos_profile, doctype=doctype)
 
 @frappe.whitelist()
+@instrumented
 def get_party_account(party_type, party, company):
     from erpnext.accounts.party import get_party_account
 
     return get_party_account(party_type, party, company)
 
 @frappe.whitelist()
+@instrumented
 def get_defaults_company_currency():
     from erpnext import get_default_company
 
-    company = get_default_company()
-    
-    if company:
-        return company, frappe.get_cached_value("Company", company, "default_currency")
-
-@frappe.whitelist()
-def get_bank_accounts_list(filters=None):
-    return frappe.db.get_list("Bank Account", filters=filters, fields="name")
-
-@frappe.whitelist()
-def get_accounts_list(filters=None):
-    return frappe.db.get_list("Account", filters=filters, fields="name")
-
-@frappe.whitelist()
-def get_mode_of_payments_list(company, filters=None):
-    modes = frappe.get_all("Mode of Payment", filters=filters, fields=["name", "type"])
-    result = []
-
-    for mode in modes:
-        account = frappe.get_value(
-            "Mode of Payment Account",
-            filters={
-                "parent": mode.name,               
-                "company": company
-            },
-            fieldname="default_account"
-        )
-
-        result.append({
-            "name": mode.name,
-            "type": mode.type,
-            "account": account
-        })
-
-    return result
-
-@frappe.whitelist()
-def get_employees_list(filters=None):
-    return frappe.db.get_list("Employee", filters=filters, fields="name")
-
-@frappe.whitelist()
-def get_suppliers_list(filters=None):
-    return frappe.db.get_list("Supplier", filters=filters, fields=["name", "supplier_name"])
-
-@frappe.whitelist()
-def get_shareholders_list(filters=None):
-    return frappe.db.get_list("Shareholder", filters=filters, fields="name")
-
-@frappe.whitelist()
-def get_customers_list(filters=None):
-    return frappe.db.get_list("Customer", filters=filters, fields=["name", "customer_name"])
-
-@frappe.whitelist()
-def get_currencies_list(filters=None):
-    return frappe.db.get_list("Currency", filters=filters, fields="name")
-
-@frappe.whitelist()
-def get_price_lists_list(filters=None):
-    return frappe.db.get_list("Price List", filters=filters, fields="name")
-
-@frappe.whitelist()
-def get_uoms_list(filters=None):
-    return frappe.db.get_list("UOM", filters=filters, fields="name")
-
-@frappe.whitelist()
-def get_sales_persons_list(filters=None):
-    return frappe.db.get_list("Sales Person", filters=filters, fields="name")
-
-@frappe.whitelist()
-def get_sales_taxes_templates_list(filters=None):
-    return frappe.db.get_list("Sales Taxes and Charges Template", filters=filters, fields="name")
-
-@frappe.whitelist()
-def get_purchase_taxes_templates_list(filters=None):
-    return frappe.db.get_list("Purchase Taxes and Charges Template", filters=filters, fields="name")
-
-@frappe.whitelist()
-def get_addresses_list(filters=None):
-    return frappe.db.get_list("Address", filters=filters, fields="name")
+    def build():
+        company = get_default_company()
 
-@frappe.whitelist()
-def get_contacts_list(filters=None):
-    return frappe.db.get_list("Contact", filters=filters, fields="name")
+        if company:
+            return company, frappe.get_cached_value("Company", company, "default_currency")
 
-@frappe.whitelist()
-def get_payment_terms_templates_list(filters=None):
-    return frappe.db.get_list("Payment Terms Template", filters=filters, fields="name")
+    return get_cached("company_defaults", "company_currency", build, scope="user")
 
-@frappe.whitelist()
-def get_payment_terms_list(filters=None):
-    return frappe.db.get_list("Payment Term", filters=filters, fields="name")
+get_bank_accounts_list = make_list_endpoint("Bank Account")
+get_accounts_list = make_list_endpoint("Account")
 
 @frappe.whitelist()
-def get_terms_and_conditions_list(filters=None):
-    return frappe.db.get_list("Terms and Conditions", filters=filters, fields="name")
+@instrumented
+def get_mode_of_payments_list(company, filters=None):
+    if isinstance(filters, str):
+        filters = json.loads(filters)
+
+    return get_mode_of_payments(company, filters)
+
+get_employees_list = make_list_endpoint("Employee")
+get_suppliers_list = make_list_endpoint("Supplier")
+get_shareholders_list = make_list_endpoint("Shareholder")
+get_customers_list = make_list_endpoint("Customer")
+get_currencies_list = make_list_endpoint("Currency")
+get_price_lists_list = make_list_endpoint("Price List")
+get_uoms_list = make_list_endpoint("UOM")
+get_sales_persons_list = make_list_endpoint("Sales Person")
+get_sales_taxes_templates_list = make_list_endpoint("Sales Taxes and Charges Template")
+get_purchase_taxes_templates_list = make_list_endpoint("Purchase Taxes and Charges Template")
+get_addresses_list = make_list_endpoint("Address")
+get_contacts_list = make_list_endpoint("Contact")
+get_payment_terms_templates_list = make_list_endpoint("Payment Terms Template")
+get_payment_terms_list = make_list_endpoint("Payment Term")
+get_terms_and_conditions_list = make_list_endpoint("Terms and Conditions")
 
 @frappe.whitelist()
+@instrumented
 def get_tax_templates():
-    try:
-        templates = frappe.get_all("Sales Taxes and Charges Template", fields=["name", "title"], order_by="creation desc")
-
-        result = []
-        for t in templates:
-            doc = frappe.get_doc("Sales Taxes and Charges Template", t.name)
-            result.append({
-                "name": doc.name,
-                "title": doc.title,
-                "taxes": [
-                    {
-                        "charge_type": tax.charge_type,
-                        "account_head": tax.account_head,
-                        "description": tax.description,
-                        "rate": tax.rate
-                    } for tax in doc.taxes
-                ]
-            })
+    def build():
+        templates = get_all_with_children(
+            "Sales Taxes and Charges Template",
+            fields=["name", "title"],
+            children={"taxes": ["charge_type", "account_head", "description", "rate"]},
+            order_by="creation desc"
+        )
 
         return {
             "status": "success",
-            "templates": result
+            "templates": templates
         }
 
+    try:
+        return conditional_response(get_doctype_version("Sales Taxes and Charges Template"), build)
+
     except Exception as e:
         frappe.log_error(frappe.get_traceback(), "Get Tax Templates Error")
         return {
@@ -554,22 +533,23 @@ def get_tax_templates():
             "message": str(e)
         }
 
-@frappe.whitelist()
-def get_cost_centers_list(filters=None):
-    return frappe.db.get_list("Cost Center", filters=filters, fields="name")
-
-@frappe.whitelist()
-def get_projects_list(filters=None):
-    return frappe.db.get_list("Project", filters=filters, fields="name")
+get_cost_centers_list = make_list_endpoint("Cost Center")
+get_projects_list = make_list_endpoint("Project")
 
 @frappe.whitelist()
+@instrumented
 def get_default_country():
     try:
-        default_country = frappe.db.get_single_value("System Settings", "country")
-        return {
-            "status": "success",
-            "default_country": default_country
-        }
+        default_country = get_cached(
+            "company_defaults",
+            "default_country",
+            lambda: frappe.db.get_single_value("System Settings", "country")
+        )
+
+        return conditional_response(
+            make_version_tag("System Settings", "country", default_country),
+            lambda: {"status": "success", "default_country": default_country}
+        )
     except Exception as e:
         frappe.log_error(frappe.get_traceback(), "Get Default Country Error")
         return {
@@ -577,11 +557,11 @@ def get_default_country():
             "message": str(e)
         }
 
-@frappe.whitelist()
-def get_warehouses():
-    return frappe.get_all("Warehouse", fields="name")
+get_warehouses = make_list_endpoint("Warehouse")
 
 @frappe.whitelist()
+@instrumented
+@idempotent
 def create_customer(customer_name, phone, address_line1, city=None, country=None):
     try:
         # Get first available Customer Group
@@ -644,36 +624,15 @@ def create_customer(customer_name, phone, address_line1, city=None, country=None
         }
 
 @frappe.whitelist()
-def get_all_customers():
+@instrumented
+def get_all_customers(search=None, cursor=None, page_length=None):
     try:
-        customers = frappe.get_all(
-            "Customer",
-            fields=["name", "customer_name", "mobile_no"],
-            order_by="creation desc"
-        )
-
-        result = []
-        for cust in customers:
-            address = frappe.db.sql("""
-                SELECT addr.address_line1, addr.city, addr.country
-                FROM `tabAddress` addr
-                JOIN `tabDynamic Link` dl ON dl.parent = addr.name
-                WHERE dl.link_doctype = 'Customer' AND dl.link_name = %s
-                LIMIT 1
-            """, cust.name, as_dict=True)
-
-            result.append({
-                "customer_id": cust.name,
-                "customer_name": cust.customer_name,
-                "phone": cust.mobile_no,
-                "address_line1": address[0].address_line1 if address else None,
-                "city": address[0].city if address else None,
-                "country": address[0].country if address else None
-            })
+        customers, next_cursor = get_customers_with_address(search, cursor, page_length)
 
         return {
             "status": "success",
-            "customers": result
+            "customers": customers,
+            "next_cursor": next_cursor
         }
 
     except Exception as e:
@@ -684,85 +643,15 @@ def get_all_customers():
         }
 
 @frappe.whitelist()
-def get_items_details_list(filters=None):
-    import json
-
+@instrumented
+def get_items_details_list(filters=None, cursor=None, page_length=None):
     try:
-        if isinstance(filters, str):
-            filters = json.loads(filters)
-
-        items = frappe.get_list(
-            "Item", 
-            filters=filters, 
-            fields=["name", "item_name", "item_group", "image", "stock_uom"], 
-            order_by="creation desc"
-        )
-
-        result = []
-        for item in items:
-            # Get latest selling price
-            item_price = frappe.db.sql("""
-                SELECT price_list_rate 
-                FROM `tabItem Price` 
-                WHERE item_code=%s AND selling=1
-                ORDER BY modified DESC 
-                LIMIT 1
-            """, (item["name"],), as_dict=True)
-
-            rate = item_price[0]["price_list_rate"] if item_price else 0
-
-            # Get barcodes
-            barcodes = frappe.get_all(
-                "Item Barcode", 
-                filters={"parent": item["name"]}, 
-                fields=["barcode"]
-            )
-
-            # Get first Item Tax Template for the item
-            item_tax = frappe.db.sql("""
-                SELECT item_tax_template
-                FROM `tabItem Tax`
-                WHERE parent=%s
-                ORDER BY idx ASC
-                LIMIT 1
-            """, (item["name"],), as_dict=True)
-
-            tax_template = None
-            tax_rate = 0
-            tax_account = None
-
-            if item_tax:
-                tax_template = item_tax[0]["item_tax_template"]
-
-                # Fetch first tax rate from the template details
-                tax_detail = frappe.db.sql("""
-                    SELECT tax_type, tax_rate
-                    FROM `tabItem Tax Template Detail`
-                    WHERE parent=%s
-                    ORDER BY idx ASC
-                    LIMIT 1
-                """, (tax_template,), as_dict=True)
-
-                if tax_detail:
-                    tax_account = tax_detail[0]["tax_type"]
-                    tax_rate = tax_detail[0]["tax_rate"]
-
-            result.append({
-                "name": item["name"],
-                "item_name": item["item_name"],
-                "item_group": item["item_group"],
-                "image": item["image"],
-                "stock_uom": item["stock_uom"],
-                "standard_rate": rate,
-                "barcodes": [b["barcode"] for b in barcodes] if barcodes else [],
-                "item_tax_template": tax_template,
-                "tax_account": tax_account,
-                "tax_rate": tax_rate
-            })
+        items, next_cursor = get_items_details(filters, cursor, page_length)
 
         return {
             "status": "success",
-            "items": result
+            "items": items,
+            "next_cursor": next_cursor
         }
 
     except Exception as e:
@@ -773,105 +662,17 @@ def get_items_details_list(filters=None):
         }
 
 @frappe.whitelist()
+@instrumented
+@idempotent
 def create_sales_invoice(data):
     try:
         if isinstance(data, str):
             data = json.loads(data)
 
-        customer = data.get("customer")
-        items = data.get("items", [])
-        if not customer or not items:
+        if not data.get("customer") or not data.get("items"):
             return {"status": "error", "message": "Customer and items are required."}
 
-        posting_date = data.get("posting_date")
-        posting_time = data.get("posting_time")
-        due_date = data.get("due_date") or posting_date
-        
-        item_rows = []
-        tax_map = {}
-
-        for item in items:
-            item_price = item.get("rate") or frappe.db.get_value("Item Price", {
-                "item_code": item["item_code"],
-                "selling": 1,
-            }, "price_list_rate")
-
-            row = {
-                    "item_code": item["item_code"],
-                    "qty": item.get("qty", 1),
-                    "rate": item_price
-                }
-
-            if item.get("item_tax_template"):
-                row["item_tax_template"] = item["item_tax_template"]
-
-                tax_details = frappe.db.sql(
-                    """
-                    SELECT tax_type, tax_rate
-                    FROM `tabItem Tax Template Detail`
-                    WHERE parent=%s
-                """,
-                    (item["item_tax_template"],),
-                    as_dict=True,
-                )
-
-                for td in tax_details:
-                    if td.tax_type not in tax_map:
-                        tax_map[td.tax_type] = {}
-                    tax_map[td.tax_type][item["item_code"]] = [td.tax_rate, td.tax_rate]
-
-            else:
-                row["item_tax_template"] = ""
-                row["item_tax_rate"] = frappe.as_json({})
-
-            item_rows.append(row)
-
-        invoice = frappe.get_doc({
-            "doctype": "Sales Invoice",
-            "customer": customer,
-            "posting_date": posting_date,
-            "posting_time": posting_time,
-            "set_posting_time": data.get("set_posting_time", 0),
-            "due_date": due_date,
-            "cost_center": data.get("cost_center"),
-            "project": data.get("project"),
-            "items": item_rows,
-            "update_stock": data.get("update_stock", 0),
-            "additional_discount_percentage": data.get("additional_discount_percentage", 0),
-            "discount_amount": data.get("discount_amount", 0),
-            "apply_discount_on": data.get("apply_discount_on"),
-            "taxes_and_charges": data.get("taxes_and_charges"),
-            "set_warehouse": data.get("warehouse"),
-        })
-
-        for account_head, details in tax_map.items():
-            invoice.append(
-                "taxes",
-                {
-                    "charge_type": "On Net Total",
-                    "account_head": account_head,
-                    "rate": 0,
-                    "item_wise_tax_detail": frappe.as_json(details),
-                    "cost_center": data.get("cost_center"),
-                    "description": f"Tax for {account_head}",
-                },
-            )
-   
-        if data.get("taxes_and_charges"):
-            tax_template = frappe.get_doc("Sales Taxes and Charges Template", data["taxes_and_charges"])
-            for tax in tax_template.taxes:
-                invoice.append("taxes", {
-                    "charge_type": tax.charge_type,
-                    "account_head": tax.account_head,
-                    "description": tax.description,
-                    "cost_center": tax.cost_center,
-                    "rate": tax.rate,
-                    "tax_amount": tax.tax_amount,
-                    "included_in_print_rate": tax.included_in_print_rate,
-                    "row_id": tax.row_id
-                })
-        
-        invoice.run_method("calculate_taxes_and_totals")
+        invoice = build_sales_invoice(data, get_invoice_context([data]))
         invoice.insert(ignore_permissions=True)
 
         return {
@@ -884,6 +685,34 @@ def create_sales_invoice(data):
         return {"status": "error", "message": str(e)}
 
 @frappe.whitelist()
+@instrumented
+def preview_sales_invoice(data):
+    try:
+        if isinstance(data, str):
+            data = json.loads(data)
+
+        if not data.get("customer") or not data.get("items"):
+            return {"status": "error", "message": "Customer and items are required."}
+
+        return {"status": "success", "invoice": get_invoice_preview(data)}
+
+    except Exception as e:
+        frappe.log_error(frappe.get_traceback(), "Preview Sales Invoice API")
+        return {"status": "error", "message": str(e)}
+
+@frappe.whitelist()
+@instrumented
+@idempotent
+def sync_offline_sales_invoices(invoices):
+    try:
+        return {"status": "success", "results": sync_sales_invoices(invoices)}
+
+    except Exception as e:
+        frappe.log_error(frappe.get_traceback(), "Sync Sales Invoices API")
+        return {"status": "error", "message": str(e)}
+
+@frappe.whitelist()
+@instrumented
 def get_sales_invoice_details(name):
     try:
         invoice = frappe.get_doc("Sales Invoice", name)
@@ -925,15 +754,24 @@ def get_sales_invoice_details(name):
         return {"status": "error", "message": str(e)}
     
 @frappe.whitelist()
-def get_all_sales_invoices(filters=None):
+@instrumented
+def get_all_sales_invoices(filters=None, cursor=None, page_length=None):
     try:
-        invoices = frappe.get_all("Sales Invoice", fields=["name", "customer_name", "posting_date", "status"], order_by="creation desc", filters=filters)
-        return {"status": "success", "invoices": invoices}
+        invoices, next_cursor = get_page(
+            "Sales Invoice",
+            ["name", "customer_name", "posting_date", "status"],
+            filters,
+            cursor,
+            page_length,
+            check_permissions=False
+        )
+        return {"status": "success", "invoices": invoices, "next_cursor": next_cursor}
     except Exception as e:
         return {"status": "error", "message": str(e)}
     
 @frappe.whitelist()
-def submit_sales_invoice(invoice_name):
+@instrumented
+def submit_sales_invoice(invoice_name, async_mode=0):
     try:
         if not invoice_name:
             return {"status": "error", "message": "Invoice name is required."}
@@ -946,6 +784,9 @@ def submit_sales_invoice(invoice_name):
         if invoice.docstatus == 2:
             return {"status": "error", "message": f"{invoice_name} is cancelled and cannot be submitted."}
 
+        if cint(async_mode):
+            return {"status": "queued", "job_id": enqueue_submit("Sales Invoice", invoice_name)}
+
         invoice.submit()
 
         return {"status": "success", "message": f"{invoice_name} submitted successfully."}
@@ -955,7 +796,8 @@ def submit_sales_invoice(invoice_name):
         return {"status": "error", "message": str(e)}
     
 @frappe.whitelist()
-def submit_payment_entry(payment_entry_name):
+@instrumented
+def submit_payment_entry(payment_entry_name, async_mode=0):
     try:
         if not payment_entry_name:
             return {"status": "error", "message": "Payment Entry name is required."}
@@ -968,6 +810,9 @@ def submit_payment_entry(payment_entry_name):
         if pe.docstatus == 2:
             return {"status": "error", "message": f"{payment_entry_name} is cancelled and cannot be submitted."}
 
+        if cint(async_mode):
+            return {"status": "queued", "job_id": enqueue_submit("Payment Entry", payment_entry_name)}
+
         pe.submit()
 
         return {"status": "success", "message": f"{payment_entry_name} submitted successfully."}
@@ -977,14 +822,23 @@ def submit_payment_entry(payment_entry_name):
         return {"status": "error", "message": str(e)}
 
 @frappe.whitelist()
-def get_all_material_requests(filters=None):
+@instrumented
+def get_all_material_requests(filters=None, cursor=None, page_length=None):
     try:
-        return frappe.get_all("Material Request", fields=["name", "material_request_type", "transaction_date", "status", "docstatus"], order_by="creation desc", filters=filters)
+        return get_list_page(
+            "Material Request",
+            ["name", "material_request_type", "transaction_date", "status", "docstatus"],
+            filters,
+            cursor,
+            page_length,
+            check_permissions=False
+        )
     except Exception as e:
         log_error("Get All Material Requests Error", e)
         return {"error": str(e)}
 
 @frappe.whitelist()
+@instrumented
 def get_material_request(name):
     try:
         doc = frappe.get_doc("Material Request", name)
@@ -994,6 +848,8 @@ def get_material_request(name):
         return {"error": str(e)}
     
 @frappe.whitelist()
+@instrumented
+@idempotent
 def create_material_request(data):
     try:
         if isinstance(data, str):
@@ -1024,10 +880,14 @@ def create_material_request(data):
         return {"error": str(e)}
 
 @frappe.whitelist()
-def submit_material_request(name):
+@instrumented
+def submit_material_request(name, async_mode=0):
     try:
         doc = frappe.get_doc("Material Request", name)
-        if doc.docstatus == 0:
+        if doc.docstatus == 0 and cint(async_mode):
+            job_id = enqueue_submit("Material Request", name)
+            return {"name": doc.name, "job_id": job_id, "message": "Material Request queued for submission."}
+        elif doc.docstatus == 0:
             doc.submit()
             return {"name": doc.name, "message": "Material Request submitted."}
         else:
@@ -1037,94 +897,146 @@ def submit_material_request(name):
         return {"error": str(e)}
 
 @frappe.whitelist()
-def get_sales_statistics():
-    today = nowdate()
-    month_start = get_first_day(today)
-    year_start = f"{getdate(today).year}-01-01"
-
-    stats = {}
-
-    default_currency = frappe.db.get_single_value("Global Defaults", "default_currency")
-    stats["currency"] = default_currency or ""
-
-    # 1- Sales Invoice today (amount + count)
-    stats["sales_today"] = frappe.db.sql("""
-        SELECT 
-            COALESCE(SUM(grand_total), 0) as total_amount,
-            COUNT(name) as total_count
-        FROM `tabSales Invoice`
-        WHERE posting_date = %s AND docstatus = 1
-    """, today, as_dict=True)[0]
-
-    # 2- Sales Invoice this month
-    stats["sales_month"] = frappe.db.sql("""
-        SELECT 
-            COALESCE(SUM(grand_total), 0) as total_amount,
-            COUNT(name) as total_count
-        FROM `tabSales Invoice`
-        WHERE posting_date >= %s AND posting_date <= %s AND docstatus = 1
-    """, (month_start, today), as_dict=True)[0]
-
-    # 3- Sales Invoice this year
-    stats["sales_year"] = frappe.db.sql("""
-        SELECT 
-            COALESCE(SUM(grand_total), 0) as total_amount,
-            COUNT(name) as total_count
-        FROM `tabSales Invoice`
-        WHERE posting_date >= %s AND posting_date <= %s AND docstatus = 1
-    """, (year_start, today), as_dict=True)[0]
-
-    # 4- Payment Entries today grouped by Mode of Payment
-    stats["payments_today"] = frappe.db.sql("""
-        SELECT 
-            mode_of_payment,
-            COALESCE(SUM(paid_amount), 0) as total_amount,
-            COUNT(name) as total_count
-        FROM `tabPayment Entry`
-        WHERE posting_date = %s AND docstatus = 1
-        GROUP BY mode_of_payment
-    """, today, as_dict=True)
-
-    # 5- Overdue / Unpaid / Partly Paid invoices
-    stats["invoice_status"] = frappe.db.sql("""
-        SELECT 
-            status,
-            COUNT(name) as total_count,
-            COALESCE(SUM(outstanding_amount), 0) as total_amount
-        FROM `tabSales Invoice`
-        WHERE status IN ('Overdue','Unpaid','Partly Paid') AND docstatus = 1
-        GROUP BY status
-    """, as_dict=True)
-
-    # total overdue amount
-    stats["total_overdue"] = frappe.db.sql("""
-        SELECT COALESCE(SUM(outstanding_amount), 0) as total_amount
-        FROM `tabSales Invoice`
-        WHERE status IN ('Overdue','Unpaid','Partly Paid') AND docstatus = 1
-    """, as_dict=True)[0]
-
-    # 6- Sales Invoice Returns today
-    stats["returns_today"] = frappe.db.sql("""
-        SELECT 
-            COALESCE(SUM(grand_total), 0) as total_amount,
-            COUNT(name) as total_count
-        FROM `tabSales Invoice`
-        WHERE posting_date = %s AND is_return = 1 AND docstatus = 1
-    """, today, as_dict=True)[0]
-
-    # 7- Top 5 items sold today
-    stats["top_items_today"] = frappe.db.sql("""
-        SELECT 
-            sii.item_code,
-            sii.item_name,
-            COALESCE(SUM(sii.qty), 0) as total_qty,
-            COALESCE(SUM(sii.amount), 0) as total_income
-        FROM `tabSales Invoice Item` sii
-        JOIN `tabSales Invoice` si ON si.name = sii.parent
-        WHERE si.posting_date = %s AND si.docstatus = 1
-        GROUP BY sii.item_code, sii.item_name
-        ORDER BY total_income DESC
-        LIMIT 5
-    """, today, as_dict=True)
-
-    return stats
+@instrumented
+def get_sales_statistics(company=None):
+    return get_rollup_sales_statistics(company)
+
+@frappe.whitelist()
+@instrumented
+def get_sales_statistics_timeseries(from_date, to_date, bucket="day", company=None):
+    try:
+        return {
+            "status": "success",
+            "bucket": bucket,
+            "buckets": get_sales_timeseries(from_date, to_date, bucket, company)
+        }
+    except Exception as e:
+        frappe.log_error(frappe.get_traceback(), "Get Sales Statistics Timeseries Error")
+        return {"status": "error", "message": str(e)}
+
+@frappe.whitelist()
+@instrumented
+def sync_master_data(cursors=None, doctypes=None, page_length=None):
+    try:
+        if isinstance(cursors, str):
+            cursors = json.loads(cursors)
+
+        if isinstance(doctypes, str):
+            doctypes = json.loads(doctypes)
+
+        return {
+            "status": "success",
+            "changes": get_changes(cursors, doctypes, page_length)
+        }
+    except Exception as e:
+        frappe.log_error(frappe.get_traceback(), "Sync Master Data Error")
+        return {"status": "error", "message": str(e)}
+
+@frappe.whitelist()
+@instrumented
+def get_doctype_list(doctype, filters=None, cursor=None, page_length=None, fields=None):
+    return get_registered_list(doctype, filters, cursor, page_length, fields)
+
+@frappe.whitelist()
+@instrumented
+def get_cache_stats():
+    frappe.only_for("System Manager")
+
+    return get_cache_statistics()
+
+@frappe.whitelist()
+@instrumented
+def batch(calls):
+    return run_batch(calls)
+
+@frappe.whitelist()
+@instrumented
+def bootstrap(company=None):
+    try:
+        snapshot = get_bootstrap_snapshot(company)
+
+        return conditional_response(
+            snapshot["version"],
+            lambda: dict(snapshot, status="success")
+        )
+    except Exception as e:
+        frappe.log_error(frappe.get_traceback(), "Bootstrap Error")
+        return {"status": "error", "message": str(e)}
+
+@frappe.whitelist()
+@instrumented
+def get_offline_catalog(company=None):
+    try:
+        company = company or get_cached(
+            "company_defaults",
+            "default_company",
+            lambda: frappe.db.get_single_value("Global Defaults", "default_company")
+        )
+        frappe.has_permission("Company", "read", company, throw=True)
+        for doctype in ("Item", "Item Price", "Customer"):
+            frappe.has_permission(doctype, "read", throw=True)
+
+        state = get_catalog_state(company)
+        if not state:
+            request_catalog_build(company)
+            return {"status": "building", "message": "The offline catalog is being prepared, try again shortly."}
+
+        return dict(state, status="success")
+    except Exception as e:
+        frappe.log_error(frappe.get_traceback(), "Get Offline Catalog Error")
+        return {"status": "error", "message": str(e)}
+
+@frappe.whitelist()
+@instrumented
+def get_rates(items, price_list=None):
+    try:
+        if isinstance(items, str):
+            items = json.loads(items)
+
+        check_price_list_access(price_list)
+
+        return {"status": "success", "rates": get_price_index_rates(items, price_list)}
+
+    except Exception as e:
+        frappe.log_error(frappe.get_traceback(), "Get Rates Error")
+        return {"status": "error", "message": str(e)}
+
+@frappe.whitelist()
+@instrumented
+def get_submit_job_status(job_id):
+    try:
+        return {"status": "success", "job": get_job_status(job_id)}
+
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
+
+@frappe.whitelist()
+@instrumented
+def get_api_metrics(endpoint=None):
+    frappe.only_for("System Manager")
+    return get_instrumentation_metrics(endpoint)
+
+@frappe.whitelist()
+@instrumented
+def get_slow_queries(limit=50):
+    frappe.only_for("System Manager")
+    return get_captured_slow_queries(limit)
+
+@frappe.whitelist()
+@instrumented
+def lookup_item_by_barcode(code, price_list=None):
+    try:
+        if not frappe.has_permission("Item", "read"):
+            return {"status": "error", "message": "Not permitted to read items."}
+
+        check_price_list_access(price_list)
+
+        item = lookup_item((code or "").strip(), price_list)
+        if not item:
+            return {"status": "error", "message": f"No item found for {code}."}
+
+        return {"status": "success", "item": item}
+
+    except Exception as e:
+        frappe.log_error(frappe.get_traceback(), "Lookup Item By Barcode Error")
+        return {"status": "error", "message": str(e)}